@@ -0,0 +1,44 @@
+"""store refresh tokens by hash
+
+Revision ID: 3c9a51e0d7b4
+Revises: b5e0c8d41f27
+Create Date: 2026-10-18 11:20:05.734219
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3c9a51e0d7b4'
+down_revision: Union[str, Sequence[str], None] = 'b5e0c8d41f27'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Existing tokens carry no jti claim and cannot be looked up any more;
+    # their owners simply log in again.
+    op.execute("DELETE FROM refresh_tokens")
+    op.drop_column('refresh_tokens', 'token')
+    op.add_column('refresh_tokens', sa.Column('jti', sa.String(length=32), nullable=False))
+    op.add_column('refresh_tokens', sa.Column('token_hash', sa.String(length=64), nullable=False))
+    op.create_unique_constraint('uq_refresh_tokens_jti', 'refresh_tokens', ['jti'])
+    # For purge_refresh_tokens: "revoked OR expires_at < now".
+    op.create_index('ix_refresh_tokens_expires_at', 'refresh_tokens', ['expires_at'], unique=False)
+    op.create_index('ix_refresh_tokens_revoked', 'refresh_tokens', ['id'], unique=False, postgresql_where=sa.text('revoked'))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_refresh_tokens_revoked', table_name='refresh_tokens', postgresql_where=sa.text('revoked'))
+    op.drop_index('ix_refresh_tokens_expires_at', table_name='refresh_tokens')
+    op.execute("DELETE FROM refresh_tokens")
+    op.drop_constraint('uq_refresh_tokens_jti', 'refresh_tokens', type_='unique')
+    op.drop_column('refresh_tokens', 'token_hash')
+    op.drop_column('refresh_tokens', 'jti')
+    op.add_column('refresh_tokens', sa.Column('token', sa.String(), nullable=False))
+    op.create_unique_constraint('refresh_tokens_token_key', 'refresh_tokens', ['token'])
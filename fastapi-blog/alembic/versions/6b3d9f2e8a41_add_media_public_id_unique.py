@@ -0,0 +1,28 @@
+"""add media public_id unique
+
+Revision ID: 6b3d9f2e8a41
+Revises: 9a4c6e1f3b87
+Create Date: 2026-10-18 19:02:13.540917
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6b3d9f2e8a41'
+down_revision: Union[str, Sequence[str], None] = '9a4c6e1f3b87'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_unique_constraint('uq_media_public_id', 'media', ['public_id'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint('uq_media_public_id', 'media', type_='unique')
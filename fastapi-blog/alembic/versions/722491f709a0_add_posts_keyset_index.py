@@ -0,0 +1,28 @@
+"""add posts keyset index
+
+Revision ID: 722491f709a0
+Revises: c37ebc306486
+Create Date: 2026-10-18 09:12:41.208113
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '722491f709a0'
+down_revision: Union[str, Sequence[str], None] = 'c37ebc306486'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_posts_category_id_id', 'posts', ['category_id', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_posts_category_id_id', table_name='posts')
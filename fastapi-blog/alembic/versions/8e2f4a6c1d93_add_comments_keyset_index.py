@@ -0,0 +1,28 @@
+"""add comments keyset index
+
+Revision ID: 8e2f4a6c1d93
+Revises: 3c9a51e0d7b4
+Create Date: 2026-10-18 13:04:27.519842
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8e2f4a6c1d93'
+down_revision: Union[str, Sequence[str], None] = '3c9a51e0d7b4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_comments_post_id_created_at_id', 'comments', ['post_id', 'created_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_comments_post_id_created_at_id', table_name='comments')
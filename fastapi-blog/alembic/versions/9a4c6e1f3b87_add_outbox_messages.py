@@ -0,0 +1,37 @@
+"""add outbox messages
+
+Revision ID: 9a4c6e1f3b87
+Revises: 5d0b8e2a7c61
+Create Date: 2026-10-18 17:21:40.118256
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9a4c6e1f3b87'
+down_revision: Union[str, Sequence[str], None] = '5d0b8e2a7c61'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('outbox_messages',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('task', sa.String(length=255), nullable=False),
+    sa.Column('args', sa.JSON(), nullable=False),
+    sa.Column('kwargs', sa.JSON(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_outbox_messages_id'), 'outbox_messages', ['id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_outbox_messages_id'), table_name='outbox_messages')
+    op.drop_table('outbox_messages')
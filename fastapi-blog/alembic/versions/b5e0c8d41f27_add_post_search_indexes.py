@@ -0,0 +1,45 @@
+"""add post search indexes
+
+Revision ID: b5e0c8d41f27
+Revises: 722491f709a0
+Create Date: 2026-10-18 10:03:17.552904
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b5e0c8d41f27'
+down_revision: Union[str, Sequence[str], None] = '722491f709a0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    # Expression must stay in sync with POST_SEARCH_VECTOR in post_service.
+    op.create_index(
+        'ix_posts_search',
+        'posts',
+        [sa.text("to_tsvector('english'::regconfig, coalesce(title, '') || ' ' || coalesce(content, ''))")],
+        postgresql_using='gin',
+    )
+    op.create_index(
+        'ix_posts_title_trgm', 'posts', ['title'],
+        postgresql_using='gin', postgresql_ops={'title': 'gin_trgm_ops'},
+    )
+    op.create_index(
+        'ix_posts_content_trgm', 'posts', ['content'],
+        postgresql_using='gin', postgresql_ops={'content': 'gin_trgm_ops'},
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_posts_content_trgm', table_name='posts')
+    op.drop_index('ix_posts_title_trgm', table_name='posts')
+    op.drop_index('ix_posts_search', table_name='posts')
@@ -0,0 +1,41 @@
+"""add direct uploads
+
+Revision ID: d4e8a1c7f602
+Revises: 6b3d9f2e8a41
+Create Date: 2026-10-18 21:14:05.671302
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd4e8a1c7f602'
+down_revision: Union[str, Sequence[str], None] = '6b3d9f2e8a41'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('direct_uploads',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('public_id', sa.String(), nullable=False),
+    sa.Column('resource_type', sa.String(), nullable=False),
+    sa.Column('post_id', sa.Integer(), nullable=False),
+    sa.Column('expires_at', sa.DateTime(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('public_id')
+    )
+    op.create_index(op.f('ix_direct_uploads_expires_at'), 'direct_uploads', ['expires_at'], unique=False)
+    op.create_index(op.f('ix_direct_uploads_id'), 'direct_uploads', ['id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_direct_uploads_id'), table_name='direct_uploads')
+    op.drop_index(op.f('ix_direct_uploads_expires_at'), table_name='direct_uploads')
+    op.drop_table('direct_uploads')
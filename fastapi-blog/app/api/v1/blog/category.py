@@ -1,28 +1,28 @@
 from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 from app.schemas.category import CategoryCreate, CategoryUpdate, CategoryOut
 from app.services.blog import category_service
-from app.db.session import get_db
+from app.db.session import get_async_db
 
 router = APIRouter()
 
 @router.get("/", response_model=List[CategoryOut])
-def list_all(db: Session = Depends(get_db)):
-    return category_service.list_categories(db)
+async def list_all(db: AsyncSession = Depends(get_async_db)):
+    return await category_service.list_categories(db)
 
 @router.post("/", response_model=CategoryOut)
-def create(category_in: CategoryCreate, db: Session = Depends(get_db)):
-    return category_service.create_category(db, category_in)
+async def create(category_in: CategoryCreate, db: AsyncSession = Depends(get_async_db)):
+    return await category_service.create_category(db, category_in)
 
 @router.get("/{category_id}", response_model=CategoryOut)
-def get(category_id: int, db: Session = Depends(get_db)):
-    return category_service.get_category(db, category_id)
+async def get(category_id: int, db: AsyncSession = Depends(get_async_db)):
+    return await category_service.get_category(db, category_id)
 
 @router.put("/{category_id}", response_model=CategoryOut)
-def update(category_id: int, category_in: CategoryUpdate, db: Session = Depends(get_db)):
-    return category_service.update_category(db, category_id, category_in)
+async def update(category_id: int, category_in: CategoryUpdate, db: AsyncSession = Depends(get_async_db)):
+    return await category_service.update_category(db, category_id, category_in)
 
 @router.delete("/{category_id}")
-def delete(category_id: int, db: Session = Depends(get_db)):
-    return category_service.delete_category(db, category_id)
+async def delete(category_id: int, db: AsyncSession = Depends(get_async_db)):
+    return await category_service.delete_category(db, category_id)
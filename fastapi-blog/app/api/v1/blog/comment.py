@@ -1,9 +1,10 @@
-from fastapi import APIRouter, Depends, status
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, Query, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Literal, Optional
 
-from app.db.session import get_db
+from app.db.session import get_async_db
 from app.core.dependencies import get_current_user
+from app.core.pagination import next_cursor
 from app.models.user import User
 from app.schemas.comment import CommentCreate, CommentUpdate, CommentOut
 from app.services.blog import comment_service
@@ -11,17 +12,28 @@ from app.services.blog import comment_service
 router = APIRouter()
 
 @router.get("/post/{post_id}", response_model=List[CommentOut], status_code=status.HTTP_200_OK)
-def get_comments(post_id: int, db: Session = Depends(get_db)):
-    return comment_service.get_comments_by_post(post_id, db)
+async def get_comments(
+    post_id: int,
+    response: Response,
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="Opaque X-Next-Cursor value from the previous page"),
+    order: Literal["newest", "oldest"] = Query("newest"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    comments = await comment_service.get_comments_by_post(post_id, db, limit=limit, cursor=cursor, order=order)
+    next_page = next_cursor(comments, limit, key=comment_service.comment_cursor)
+    if next_page:
+        response.headers["X-Next-Cursor"] = next_page
+    return comments
 
 @router.post("/post/{post_id}", response_model=CommentOut, status_code=status.HTTP_201_CREATED)
-async def create_comment(post_id: int, comment: CommentCreate, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+async def create_comment(post_id: int, comment: CommentCreate, db: AsyncSession = Depends(get_async_db), current_user: User = Depends(get_current_user)):
     return await comment_service.create_comment(post_id, comment, db, current_user)
 
 @router.put("/{comment_id}", response_model=CommentOut)
-async def update_comment(comment_id: int, comment_data: CommentUpdate, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+async def update_comment(comment_id: int, comment_data: CommentUpdate, db: AsyncSession = Depends(get_async_db), current_user: User = Depends(get_current_user)):
     return await comment_service.update_comment(comment_id, comment_data, db, current_user)
 
 @router.delete("/{comment_id}")
-async def delete_comment(comment_id: int, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+async def delete_comment(comment_id: int, db: AsyncSession = Depends(get_async_db), current_user: User = Depends(get_current_user)):
     return await comment_service.delete_comment(comment_id, db, current_user)
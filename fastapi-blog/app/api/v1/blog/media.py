@@ -1,33 +1,50 @@
-from fastapi import APIRouter, UploadFile, File, Depends
+from typing import Optional
+from fastapi import APIRouter, UploadFile, File, Depends, Query
 from fastapi import status
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import event
 
-from app.db.session import get_db
+from app.db.session import get_async_db
 from app.models.media import Media
 from app.models.user import User
 from app.core.dependencies import get_current_user
-from app.schemas.media import MediaOut
+from app.schemas.media import MediaOut, MediaResourceType, MediaUploadConfirm, MediaUploadSignature, MediaVariant
 from app.services.blog import media_service
 
 router = APIRouter()
 
 @router.post("/upload/{post_id}", response_model=MediaOut, status_code=status.HTTP_201_CREATED)
-def upload_media(post_id: int,
-                 file: UploadFile = File(...),
-                 db: Session = Depends(get_db),
-                 current_user: User = Depends(get_current_user)):
-    return media_service.upload_media(post_id, file, db, current_user)
+async def upload_media(post_id: int,
+                       file: UploadFile = File(...),
+                       db: AsyncSession = Depends(get_async_db),
+                       current_user: User = Depends(get_current_user)):
+    return await media_service.upload_media(post_id, file, db, current_user)
+
+@router.post("/upload/{post_id}/sign", response_model=MediaUploadSignature)
+async def sign_media_upload(post_id: int,
+                            resource_type: MediaResourceType = Query("image", description="Kind of file that will be uploaded"),
+                            db: AsyncSession = Depends(get_async_db),
+                            current_user: User = Depends(get_current_user)):
+    return await media_service.sign_media_upload(post_id, resource_type, db, current_user)
+
+@router.post("/upload/{post_id}/confirm", response_model=MediaOut, status_code=status.HTTP_201_CREATED)
+async def confirm_media_upload(post_id: int,
+                               upload: MediaUploadConfirm,
+                               db: AsyncSession = Depends(get_async_db),
+                               current_user: User = Depends(get_current_user)):
+    return await media_service.confirm_media_upload(post_id, upload, db, current_user)
 
 @router.get("/{media_id}", response_model=MediaOut)
-def get_media(media_id: int, db: Session = Depends(get_db)):
-    return media_service.get_media(media_id, db)
+async def get_media(media_id: int,
+                    variant: Optional[MediaVariant] = Query(None, description="Return this variant's URL as url"),
+                    db: AsyncSession = Depends(get_async_db)):
+    return await media_service.get_media(media_id, db, variant)
 
 @router.delete("/{media_id}")
-def delete_media(media_id: int,
-                 db: Session = Depends(get_db),
-                 current_user: User = Depends(get_current_user)):
-    return media_service.delete_media(media_id, db, current_user)
+async def delete_media(media_id: int,
+                       db: AsyncSession = Depends(get_async_db),
+                       current_user: User = Depends(get_current_user)):
+    return await media_service.delete_media(media_id, db, current_user)
 
 @event.listens_for(Media, "before_delete")
 def delete_media_file(mapper, connection, target):
@@ -1,44 +1,68 @@
-from fastapi import APIRouter, Depends, status, Query
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, status, Query, Response
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
-from app.db.session import get_db
-from app.schemas.post import PostCreate, PostUpdate, PostOut
+from app.db.session import get_async_db
+from app.schemas.post import PostCreate, PostUpdate, PostOut, PostSummaryOut
 from app.models.user import User
 from app.core.dependencies import get_current_user
+from app.core.pagination import next_cursor
 from app.services.blog import post_service
 
 router = APIRouter()
 
 
 @router.get("/", response_model=List[PostOut])
-def list_posts(
-    search: Optional[str] = Query(None),
+async def list_posts(
+    response: Response,
+    search: Optional[str] = Query(None, description="Full-text query; results are ranked and paginated by offset"),
     category_id: Optional[int] = Query(None),
     limit: int = Query(10, ge=1, le=100),
     offset: int = Query(0, ge=0),
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = Query(None, description="Opaque X-Next-Cursor value from the previous page; takes precedence over offset"),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    return post_service.list_posts(search, category_id, limit, offset, db)
+    posts = await post_service.list_posts(search, category_id, limit, offset, db, cursor=cursor)
+    next_page = None if search else next_cursor(posts, limit)
+    if next_page:
+        response.headers["X-Next-Cursor"] = next_page
+    return posts
 
 
+@router.get("/summary", response_model=List[PostSummaryOut])
+async def list_post_summaries(
+    response: Response,
+    search: Optional[str] = Query(None, description="Full-text query; results are ranked and paginated by offset"),
+    category_id: Optional[int] = Query(None),
+    limit: int = Query(10, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None, description="Opaque X-Next-Cursor value from the previous page; takes precedence over offset"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    posts = await post_service.list_post_summaries(search, category_id, limit, offset, db, cursor=cursor)
+    next_page = None if search else next_cursor(posts, limit)
+    if next_page:
+        response.headers["X-Next-Cursor"] = next_page
+    return posts
+
 
 @router.get("/post/{post_id}", response_model=PostOut)
-def get_post(post_id: int, db: Session = Depends(get_db)):
-    return post_service.get_post_by_id(post_id, db)
+async def get_post(post_id: int, db: AsyncSession = Depends(get_async_db)):
+    payload = await post_service.get_post_payload(post_id, db)
+    return Response(content=payload, media_type="application/json")
 
 
 @router.post("/post/", response_model=PostOut, status_code=status.HTTP_201_CREATED)
-def create_post(post: PostCreate, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    return post_service.create_post(post, db, current_user)
+async def create_post(post: PostCreate, db: AsyncSession = Depends(get_async_db), current_user: User = Depends(get_current_user)):
+    return await post_service.create_post(post, db, current_user)
 
 
 @router.put("/post/{post_id}", response_model=PostOut)
-def update_post(post_id: int, post_data: PostUpdate, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    return post_service.update_post(post_id, post_data, db, current_user)
+async def update_post(post_id: int, post_data: PostUpdate, db: AsyncSession = Depends(get_async_db), current_user: User = Depends(get_current_user)):
+    return await post_service.update_post(post_id, post_data, db, current_user)
 
 
 @router.delete("/post/{post_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_post(post_id: int, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    post_service.delete_post(post_id, db, current_user)
+async def delete_post(post_id: int, db: AsyncSession = Depends(get_async_db), current_user: User = Depends(get_current_user)):
+    await post_service.delete_post(post_id, db, current_user)
     return {"message": "Post deleted"}
     
\ No newline at end of file
@@ -0,0 +1,8 @@
+from fastapi import APIRouter
+from app.core.metrics import collect_metrics
+
+router = APIRouter()
+
+@router.get("/metrics")
+def get_metrics():
+    return collect_metrics()
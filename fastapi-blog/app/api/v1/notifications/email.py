@@ -1,10 +1,13 @@
-from fastapi import APIRouter, status
+from fastapi import APIRouter, Depends, status
+from starlette.concurrency import run_in_threadpool
+from app.core.dependencies import rate_limit_key
 from app.schemas.email import EmailRequest
-from app.services.notifications.email_service import send_email_async
+from app.services.notifications.email_service import admit_email_request, send_email_async
 
 router = APIRouter()
 
 @router.post("/email", status_code=status.HTTP_202_ACCEPTED)
-def send_email_notification(payload: EmailRequest):
-    send_email_async(payload)
+async def send_email_notification(payload: EmailRequest, client_key: str = Depends(rate_limit_key)):
+    await admit_email_request(client_key)
+    await run_in_threadpool(send_email_async, payload)
     return {"message": "Email is being sent via Celery"}
@@ -0,0 +1,20 @@
+from fastapi import APIRouter, Depends, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.session import get_async_db
+from app.core.dependencies import get_current_user
+from app.models.user import User
+from app.schemas.subscription import SubscriptionOut
+from app.schemas.user import MessageResponse
+from app.services.users import subscription_service
+
+router = APIRouter()
+
+@router.post("/{author_id}/subscription", response_model=SubscriptionOut, status_code=status.HTTP_201_CREATED)
+async def subscribe(author_id: int, db: AsyncSession = Depends(get_async_db), current_user: User = Depends(get_current_user)):
+    return await subscription_service.subscribe(author_id, db, current_user)
+
+@router.delete("/{author_id}/subscription", response_model=MessageResponse)
+async def unsubscribe(author_id: int, db: AsyncSession = Depends(get_async_db), current_user: User = Depends(get_current_user)):
+    await subscription_service.unsubscribe(author_id, db, current_user)
+    return MessageResponse(message="Unsubscribed")
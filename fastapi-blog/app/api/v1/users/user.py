@@ -1,8 +1,8 @@
 from fastapi import APIRouter, Depends, status
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db.session import get_db
+from app.db.session import get_async_db
 from app.schemas.user import UserCreate, UserOut, Token, RefreshTokenRequest, MessageResponse
 from app.services.users.user_service import (
     register_user, authenticate_user,
@@ -12,18 +12,18 @@ from app.services.users.user_service import (
 router = APIRouter()
 
 @router.post("/register", response_model=UserOut, status_code=status.HTTP_201_CREATED)
-def register(user: UserCreate, db: Session = Depends(get_db)):
-    return register_user(user, db)
+async def register(user: UserCreate, db: AsyncSession = Depends(get_async_db)):
+    return await register_user(user, db)
 
 @router.post("/login", response_model=Token)
-def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
-    return authenticate_user(form_data.username, form_data.password, db)
+async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: AsyncSession = Depends(get_async_db)):
+    return await authenticate_user(form_data.username, form_data.password, db)
 
 @router.post("/refresh", response_model=Token)
-def refresh(data: RefreshTokenRequest, db: Session = Depends(get_db)):
-    return refresh_user_token(data, db)
+async def refresh(data: RefreshTokenRequest, db: AsyncSession = Depends(get_async_db)):
+    return await refresh_user_token(data, db)
 
 @router.post("/logout", response_model=MessageResponse)
-def logout(data: RefreshTokenRequest, db: Session = Depends(get_db)):
-    logout_user(data, db)
+async def logout(data: RefreshTokenRequest, db: AsyncSession = Depends(get_async_db)):
+    await logout_user(data, db)
     return MessageResponse(message="Logout successful")
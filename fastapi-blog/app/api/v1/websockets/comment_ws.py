@@ -1,13 +1,21 @@
-from fastapi import APIRouter, WebSocket, WebSocketDisconnect
+from typing import Optional
+from fastapi import APIRouter, Query, WebSocket, WebSocketDisconnect
 from app.websockets.comment_manager import comment_manager
 
 router = APIRouter()
 
 @router.websocket("/comments/{post_id}")
-async def comment_websocket(websocket: WebSocket, post_id: int):
-    await comment_manager.connect(websocket, post_id)
+async def comment_websocket(websocket: WebSocket, post_id: int, since: Optional[int] = Query(None, ge=0)):
+    # Reconnecting clients pass the last "seq" they saw to receive what they missed.
+    connection = await comment_manager.connect(websocket, post_id, since)
     try:
         while True:
-            await websocket.receive_json()
+            # Any client frame, typically {"type": "pong"} in reply to a ping,
+            # proves the socket is alive; only required when
+            # COMMENT_WS_IDLE_TIMEOUT_SECONDS is set.
+            await websocket.receive_text()
+            connection.touch()
     except WebSocketDisconnect:
-        comment_manager.disconnect(websocket, post_id)
+        pass
+    finally:
+        await comment_manager.disconnect(connection)
@@ -0,0 +1,136 @@
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from redis import asyncio as aioredis
+from redis.exceptions import RedisError
+
+from app.core.config import settings
+
+
+class InMemoryCache:
+    """Per-process LRU cache whose entries expire after ``ttl`` seconds.
+
+    Values are stored as-is, so unlike the Redis backend it can hold any object.
+    """
+
+    def __init__(self, namespace: str, ttl: int, max_entries: int):
+        self.namespace = namespace
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, bytes]]" = OrderedDict()
+
+    async def get(self, key) -> Optional[bytes]:
+        key = str(key)
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    async def set(self, key, value: bytes):
+        key = str(key)
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def delete(self, key):
+        self.discard(key)
+
+    async def delete_many(self, keys):
+        for key in keys:
+            self.discard(key)
+
+    def discard(self, key):
+        """Synchronous delete, usable from SQLAlchemy event hooks."""
+        self._entries.pop(str(key), None)
+
+    async def clear(self):
+        self._entries.clear()
+
+
+class RedisCache:
+    """Cache shared by all workers; Redis errors degrade to cache misses."""
+
+    def __init__(self, namespace: str, ttl: int, url: str):
+        self.namespace = namespace
+        self.ttl = ttl
+        self.client = aioredis.from_url(url)
+
+    def _key(self, key) -> str:
+        return f"cache:{self.namespace}:{key}"
+
+    async def get(self, key) -> Optional[bytes]:
+        try:
+            return await self.client.get(self._key(key))
+        except RedisError as e:
+            print(f"[ERROR] Redis cache get failed: {e}")
+            return None
+
+    async def set(self, key, value: bytes):
+        try:
+            await self.client.set(self._key(key), value, ex=self.ttl)
+        except RedisError as e:
+            print(f"[ERROR] Redis cache set failed: {e}")
+
+    async def delete(self, key):
+        try:
+            await self.client.delete(self._key(key))
+        except RedisError as e:
+            print(f"[ERROR] Redis cache delete failed: {e}")
+
+    async def delete_many(self, keys):
+        keys = [self._key(key) for key in keys]
+        if not keys:
+            return
+        try:
+            await self.client.delete(*keys)
+        except RedisError as e:
+            print(f"[ERROR] Redis cache delete failed: {e}")
+
+    async def clear(self):
+        try:
+            async for key in self.client.scan_iter(match=self._key("*")):
+                await self.client.delete(key)
+        except RedisError as e:
+            print(f"[ERROR] Redis cache clear failed: {e}")
+
+
+class NullCache:
+    async def get(self, key) -> Optional[bytes]:
+        return None
+
+    async def set(self, key, value: bytes):
+        pass
+
+    async def delete(self, key):
+        pass
+
+    async def delete_many(self, keys):
+        pass
+
+    async def clear(self):
+        pass
+
+
+def build_cache(namespace: str, backend: str, ttl: int, max_entries: int):
+    if backend == "memory":
+        return InMemoryCache(namespace, ttl, max_entries)
+    if backend == "redis":
+        return RedisCache(namespace, ttl, settings.CACHE_REDIS_URL or settings.REDIS_BROKER_URL)
+    if backend == "none":
+        return NullCache()
+    raise ValueError(f"Unknown cache backend: {backend}")
+
+
+post_cache = build_cache(
+    "post",
+    settings.POST_CACHE_BACKEND,
+    ttl=settings.POST_CACHE_TTL_SECONDS,
+    max_entries=settings.POST_CACHE_MAX_ENTRIES,
+)
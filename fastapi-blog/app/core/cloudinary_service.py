@@ -1,7 +1,12 @@
 import cloudinary
+import cloudinary.api
+import cloudinary.exceptions
 import cloudinary.uploader
+import cloudinary.utils
 import os
+import time
 from dotenv import load_dotenv
+from app.core.config import settings
 
 load_dotenv()
 
@@ -11,13 +16,78 @@ cloudinary.config(
     api_secret=os.getenv("CLOUDINARY_API_SECRET")
 )
 
-def upload_media_to_cloudinary(file, folder="media"):
-    result = cloudinary.uploader.upload(file, folder=folder, resource_type="auto")
+# Delivery transformations; Cloudinary derives and caches each one on first request.
+IMAGE_VARIANTS = {
+    "thumbnail": {"width": 150, "height": 150, "crop": "fill", "gravity": "auto", "fetch_format": "auto", "quality": "auto"},
+    "medium": {"width": 800, "crop": "limit", "fetch_format": "auto", "quality": "auto"},
+    "webp": {"format": "webp", "quality": "auto"},
+    "avif": {"format": "avif", "quality": "auto"},
+}
+# A still frame of a video, usable as a poster.
+VIDEO_VARIANTS = {
+    "thumbnail": {"width": 150, "height": 150, "crop": "fill", "format": "jpg"},
+}
+
+def upload_media_to_cloudinary(file, folder="media", filename=None):
+    # Sent in MEDIA_UPLOAD_CHUNK_SIZE pieces, so only one chunk is in memory at a time.
+    options = {"folder": folder, "resource_type": "auto", "chunk_size": settings.MEDIA_UPLOAD_CHUNK_SIZE}
+    if filename:
+        options["filename"] = filename
+    result = cloudinary.uploader.upload_large(file, **options)
     return {
         "url": result["secure_url"],
         "public_id": result["public_id"],
         "media_type": result["resource_type"]
     }
 
-def delete_media_from_cloudinary(public_id, media_type):
-    return cloudinary.uploader.destroy(public_id, resource_type=media_type)
+def sign_direct_upload(public_id, resource_type):
+    """Parameters a client sends with its own upload to Cloudinary's upload API.
+
+    Only the pre-assigned ``public_id`` is signed, so the client cannot choose
+    where the file lands; the upload URL fixes its ``resource_type``.
+    Cloudinary rejects signatures older than an hour.
+    """
+    params = {"public_id": public_id, "timestamp": int(time.time())}
+    config = cloudinary.config()
+    return {
+        **params,
+        "signature": cloudinary.utils.api_sign_request(params, config.api_secret),
+        "api_key": config.api_key,
+        "resource_type": resource_type,
+        "upload_url": f"https://api.cloudinary.com/v1_1/{config.cloud_name}/{resource_type}/upload",
+    }
+
+def verify_direct_upload(public_id, version, signature):
+    """Check the ``signature`` Cloudinary returned for the upload of ``public_id``."""
+    return cloudinary.utils.verify_api_response_signature(public_id, version, signature)
+
+def fetch_uploaded_resource(public_id, resource_type):
+    """Look up what was actually stored under ``public_id`` with one Admin API call.
+
+    Returns the resource (``bytes``, ``version``, ...) or ``None`` if nothing
+    was uploaded there. The Admin API is rate limited per hour.
+    """
+    try:
+        return cloudinary.api.resource(public_id, resource_type=resource_type)
+    except cloudinary.exceptions.NotFound:
+        return None
+
+def media_url(public_id, media_type, version=None):
+    url, _ = cloudinary.utils.cloudinary_url(public_id, resource_type=media_type, version=version, secure=True)
+    return url
+
+def media_variant_urls(public_id, media_type):
+    """URLs of the resized/re-encoded variants of a resource, built from its public_id alone."""
+    variants = {"image": IMAGE_VARIANTS, "video": VIDEO_VARIANTS}.get(media_type, {})
+    return {
+        name: cloudinary.utils.cloudinary_url(public_id, resource_type=media_type, secure=True, **options)[0]
+        for name, options in variants.items()
+    }
+
+def delete_media_batch_from_cloudinary(public_ids, media_type):
+    """Delete up to 100 resources in one Admin API call.
+
+    Returns the ids that are gone, including ones Cloudinary no longer had.
+    """
+    result = cloudinary.api.delete_resources(public_ids, resource_type=media_type)
+    return [public_id for public_id, state in result.get("deleted", {}).items() if state in ("deleted", "not_found")]
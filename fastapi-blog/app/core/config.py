@@ -1,4 +1,5 @@
 import os
+from typing import Optional
 from dotenv import load_dotenv
 from pydantic_settings import BaseSettings
 
@@ -10,19 +11,133 @@ class Settings(BaseSettings):
 
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 15
     REFRESH_TOKEN_EXPIRE_DAYS: int = 7
+    # Put username/email in access tokens and trust them instead of loading the user.
+    ACCESS_TOKEN_EMBED_CLAIMS: bool = False
+    PRINCIPAL_CACHE_TTL_SECONDS: int = 30
+    PRINCIPAL_CACHE_MAX_ENTRIES: int = 10000
+
+    BCRYPT_ROUNDS: int = 12
+    # Size of the process pool running bcrypt, and how many hash/verify calls
+    # may be in flight per app worker before new ones get a 503.
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_MAX_PENDING: int = 64
 
     SQLALCHEMY_DATABASE_URI: str
+    # Derived from SQLALCHEMY_DATABASE_URI (asyncpg driver) when not set.
+    ASYNC_SQLALCHEMY_DATABASE_URI: Optional[str] = None
     TEST_DATABASE_URL: str 
+    # Applied to the sync and the async engine alike, so each app worker can
+    # hold up to 2 * (DB_POOL_SIZE + DB_MAX_OVERFLOW) connections.
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT_SECONDS: float = 30
+    # Reopen connections older than this (-1 never), ahead of server/proxy idle cuts.
+    DB_POOL_RECYCLE_SECONDS: int = 1800
+    # Test each connection with a round trip on checkout, or let failures surface on first use.
+    DB_POOL_PRE_PING: bool = True
+    # Reuse the most recent connection so surplus ones idle out server-side.
+    DB_POOL_USE_LIFO: bool = False
 
     CLOUDINARY_CLOUD_NAME: str
     CLOUDINARY_API_KEY: str
     CLOUDINARY_API_SECRET: str
+    # "cloudinary", or "local" to keep files under MEDIA_LOCAL_ROOT (tests, development).
+    MEDIA_STORAGE_BACKEND: str = "cloudinary"
+    MEDIA_LOCAL_ROOT: str = "media"
+    MEDIA_LOCAL_BASE_URL: str = "/media"
+    MEDIA_MAX_UPLOAD_BYTES: int = 100 * 1024 * 1024
+    # Cloudinary requires chunks of at least 5 MB.
+    MEDIA_UPLOAD_CHUNK_SIZE: int = 20 * 1024 * 1024
+    # Uploads run in their own thread pool of this size; once
+    # MEDIA_UPLOAD_MAX_PENDING are in flight new ones get a 503.
+    MEDIA_UPLOAD_CONCURRENCY: int = 4
+    MEDIA_UPLOAD_MAX_PENDING: int = 16
+    # Removed files are queued in media_deletions and deleted in batches
+    # (Cloudinary accepts at most 100 ids per call).
+    MEDIA_DELETION_BATCH_SIZE: int = 100
+    MEDIA_DELETION_MAX_RETRIES: int = 5
+    # Failed deletions per file before it is left in the table for manual cleanup.
+    MEDIA_DELETION_MAX_ATTEMPTS: int = 10
+    MEDIA_DELETION_SWEEP_INTERVAL_SECONDS: float = 30
+    # Direct uploads not confirmed this long after signing are deleted
+    # (Cloudinary accepts a signature for an hour).
+    MEDIA_DIRECT_UPLOAD_EXPIRY_SECONDS: int = 2 * 60 * 60
+    MEDIA_DIRECT_UPLOAD_SWEEP_INTERVAL_MINUTES: int = 15
 
     REDIS_BROKER_URL: str = "redis://redis:6379/0"
+    # Celery queue for the periodic beat tasks (purges, outbox relay, media sweeps).
+    CELERY_HOUSEKEEPING_QUEUE: str = "housekeeping"
+    REFRESH_TOKEN_PURGE_INTERVAL_MINUTES: int = 60
+    REFRESH_TOKEN_PURGE_BATCH_SIZE: int = 1000
     SMTP_USER: str
     SMTP_PASSWORD: str
     SMTP_HOST: str = "smtp.gmail.com"
     SMTP_PORT: int = 587
+    # "smtp", or "locmem" to collect messages in memory (tests, development).
+    EMAIL_BACKEND: str = "smtp"
+    # Sessions kept open per worker process; one is enough for the prefork pool.
+    SMTP_POOL_SIZE: int = 1
+    SMTP_MAX_MESSAGES_PER_CONNECTION: int = 100
+    SMTP_TIMEOUT_SECONDS: float = 30
+    # New-post notifications: subscribers per send task, and send tasks
+    # published together as one Celery group.
+    NOTIFICATION_FANOUT_CHUNK_SIZE: int = 500
+    NOTIFICATION_FANOUT_GROUP_SIZE: int = 20
+    # Delivery records only need to outlive task retries and redeliveries.
+    NOTIFICATION_DELIVERY_RETENTION_DAYS: int = 7
+    NOTIFICATION_DELIVERY_PURGE_INTERVAL_MINUTES: int = 60
+    NOTIFICATION_DELIVERY_PURGE_BATCH_SIZE: int = 5000
+    # How often beat runs relay_outbox, and rows published per transaction.
+    OUTBOX_RELAY_INTERVAL_SECONDS: float = 2.0
+    OUTBOX_RELAY_BATCH_SIZE: int = 100
+
+    # POST /notifications/email: per-client token bucket ("memory" or "redis")
+    # and the Celery queue backlog past which requests get a 503.
+    EMAIL_RATE_LIMIT_BACKEND: str = "memory"
+    EMAIL_RATE_LIMIT_PER_MINUTE: int = 10
+    EMAIL_RATE_LIMIT_BURST: int = 5
+    # Defaults to REDIS_BROKER_URL when not set.
+    RATE_LIMIT_REDIS_URL: Optional[str] = None
+    EMAIL_QUEUE_NAME: str = "celery"
+    EMAIL_QUEUE_MAX_DEPTH: int = 10000
+
+    VIEW_COUNT_FLUSH_INTERVAL_SECONDS: float = 5.0
+    VIEW_COUNT_FLUSH_THRESHOLD: int = 1000
+
+    POST_SEARCH_TRIGRAM_FALLBACK: bool = True
+
+    # "memory" (per-process LRU), "redis" (shared across workers) or "none"
+    POST_CACHE_BACKEND: str = "memory"
+    POST_CACHE_TTL_SECONDS: int = 60
+    POST_CACHE_MAX_ENTRIES: int = 1024
+    # Defaults to REDIS_BROKER_URL when not set.
+    CACHE_REDIS_URL: Optional[str] = None
+
+    # "memory" only reaches sockets on the same worker; use "redis" to run
+    # more than one worker.
+    COMMENT_BROADCAST_BACKEND: str = "memory"
+    # Defaults to REDIS_BROKER_URL when not set.
+    COMMENT_BROADCAST_REDIS_URL: Optional[str] = None
+    # Outbound frames buffered per socket before a slow client is dropped.
+    COMMENT_WS_QUEUE_SIZE: int = 100
+    # Server sends {"type": "ping"} this often. Dead connections are found by
+    # uvicorn's protocol-level pings (see entrypoint.sh), which browsers answer
+    # on their own. Setting COMMENT_WS_IDLE_TIMEOUT_SECONDS (0 = off) also closes
+    # sockets that sent nothing for that long, so clients must then reply
+    # {"type": "pong"} to every ping.
+    COMMENT_WS_PING_INTERVAL_SECONDS: float = 20.0
+    COMMENT_WS_IDLE_TIMEOUT_SECONDS: float = 0
+    # Coalesce comment events per post for this long (0 disables batching).
+    COMMENT_BATCH_WINDOW_MS: int = 0
+    COMMENT_BATCH_MAX_SIZE: int = 100
+    # Recent frames kept per post so reconnecting clients can resume with ?since=<seq>.
+    COMMENT_REPLAY_BUFFER_SIZE: int = 200
+    COMMENT_REPLAY_TTL_SECONDS: int = 3600
+    # Redis broker: per-post sequence counters expire this long after the last
+    # comment (never sooner than COMMENT_REPLAY_TTL_SECONDS).
+    COMMENT_SEQ_TTL_SECONDS: int = 24 * 3600
+    # In-memory broker only: posts whose replay state is kept (least recently published dropped first).
+    COMMENT_REPLAY_MAX_POSTS: int = 1000
     class Config:
         env_file = ".env"
 
@@ -1,14 +1,33 @@
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
-from sqlalchemy.orm import Session
-from app.db.session import get_db
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.session import get_async_db
 from app.models.user import User
+from app.core.cache import InMemoryCache
 from app.core.config import settings
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/users/login")
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> User:
+# user id -> {"id", "username", "email"} of recently authenticated users
+principal_cache = InMemoryCache(
+    "principal",
+    ttl=settings.PRINCIPAL_CACHE_TTL_SECONDS,
+    max_entries=settings.PRINCIPAL_CACHE_MAX_ENTRIES,
+)
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def invalidate_principal(mapper, connection, target):
+    principal_cache.discard(target.id)
+
+async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_db)) -> User:
+    """Resolve the bearer token to a detached User carrying id, username and email.
+
+    The user row is only loaded when neither the token claims nor the
+    principal cache can answer, so most requests never touch the DB.
+    """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -28,8 +47,34 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
     except (JWTError, ValueError):
         raise credentials_exception
 
-    user = db.query(User).filter(User.id == user_id).first()
-    if user is None:
-        raise credentials_exception
+    if settings.ACCESS_TOKEN_EMBED_CLAIMS and "username" in payload and "email" in payload:
+        return User(id=user_id, username=payload["username"], email=payload["email"])
+
+    principal = await principal_cache.get(user_id)
+    if principal is None:
+        user = await db.get(User, user_id)
+        if user is None:
+            raise credentials_exception
+        principal = {"id": user.id, "username": user.username, "email": user.email}
+        await principal_cache.set(user_id, principal)
+
+    return User(**principal)
+
+def rate_limit_key(request: Request) -> str:
+    """Who a request counts against: the bearer token's user, else the client address.
 
-    return user
+    The token is only decoded, not checked against the database. Behind a
+    reverse proxy, ``request.client`` is the proxy unless uvicorn trusts it to
+    set X-Forwarded-For (``--proxy-headers`` with the proxy's address in
+    ``FORWARDED_ALLOW_IPS``, see entrypoint.sh); otherwise every client shares
+    one bucket.
+    """
+    scheme, _, token = request.headers.get("Authorization", "").partition(" ")
+    if scheme.lower() == "bearer" and token:
+        try:
+            payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+            if payload.get("sub"):
+                return f"user:{payload['sub']}"
+        except JWTError:
+            pass
+    return f"ip:{request.client.host if request.client else 'unknown'}"
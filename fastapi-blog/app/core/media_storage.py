@@ -0,0 +1,83 @@
+import asyncio
+import mimetypes
+import os
+import shutil
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Optional
+
+from fastapi import HTTPException, status
+
+from app.core.config import settings
+
+_upload_executor: Optional[ThreadPoolExecutor] = None
+_upload_pending = 0
+
+
+def _media_type(filename: Optional[str]) -> str:
+    mime_type, _ = mimetypes.guess_type(filename or "")
+    if mime_type and mime_type.split("/")[0] in ("image", "video"):
+        return mime_type.split("/")[0]
+    return "raw"
+
+
+def save_media_locally(file, folder="media", filename=None):
+    """Stand-in for Cloudinary that copies the upload under MEDIA_LOCAL_ROOT."""
+    extension = os.path.splitext(filename or "")[1]
+    public_id = f"{folder}/{uuid.uuid4().hex}{extension}"
+    path = os.path.join(settings.MEDIA_LOCAL_ROOT, public_id)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as out:
+        try:
+            shutil.copyfileobj(file, out, settings.MEDIA_UPLOAD_CHUNK_SIZE)
+        except Exception:
+            out.close()
+            os.remove(path)
+            raise
+    return {
+        "url": f"{settings.MEDIA_LOCAL_BASE_URL.rstrip('/')}/{public_id}",
+        "public_id": public_id,
+        "media_type": _media_type(filename),
+    }
+
+
+def delete_media_locally(public_id):
+    try:
+        os.remove(os.path.join(settings.MEDIA_LOCAL_ROOT, public_id))
+    except FileNotFoundError:
+        pass
+
+
+def _get_upload_executor() -> ThreadPoolExecutor:
+    global _upload_executor
+    if _upload_executor is None:
+        _upload_executor = ThreadPoolExecutor(
+            max_workers=settings.MEDIA_UPLOAD_CONCURRENCY, thread_name_prefix="media-upload"
+        )
+    return _upload_executor
+
+
+async def run_upload(func, *args, **kwargs):
+    # Uploads get their own pool so slow ones cannot starve the threadpool
+    # that serves other endpoints; past the pending limit clients retry later.
+    global _upload_pending
+    if _upload_pending >= settings.MEDIA_UPLOAD_MAX_PENDING:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many concurrent uploads",
+            headers={"Retry-After": "5"},
+        )
+    _upload_pending += 1
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_get_upload_executor(), partial(func, *args, **kwargs))
+    finally:
+        _upload_pending -= 1
+
+
+def shutdown_media_uploader():
+    global _upload_executor
+    if _upload_executor is not None:
+        _upload_executor.shutdown(wait=False, cancel_futures=True)
+        _upload_executor = None
@@ -0,0 +1,12 @@
+from typing import Any, Callable, Dict
+
+# name -> zero-argument callable returning the current value
+_gauges: Dict[str, Callable[[], Any]] = {}
+
+
+def register_gauge(name: str, collect: Callable[[], Any]):
+    _gauges[name] = collect
+
+
+def collect_metrics() -> Dict[str, Any]:
+    return {name: collect() for name, collect in _gauges.items()}
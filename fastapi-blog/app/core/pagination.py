@@ -0,0 +1,28 @@
+import base64
+import binascii
+import json
+from typing import Callable, Optional, Sequence
+from fastapi import HTTPException, status
+
+
+def encode_cursor(values: dict) -> str:
+    raw = json.dumps(values, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> dict:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except (binascii.Error, ValueError):
+        values = None
+    if not isinstance(values, dict):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+    return values
+
+
+def next_cursor(items: Sequence, limit: int, key: Callable[[object], dict] = lambda item: {"id": item.id}) -> Optional[str]:
+    """Cursor pointing after the last item, or None when this was the last page."""
+    if len(items) < limit:
+        return None
+    return encode_cursor(key(items[-1]))
@@ -0,0 +1,85 @@
+import time
+from collections import OrderedDict
+from typing import Tuple
+
+from redis import asyncio as aioredis
+from redis.exceptions import RedisError
+
+from app.core.config import settings
+
+
+class InMemoryRateLimiter:
+    """Per-process token buckets: ``burst`` requests at once, refilled at ``rate`` per second.
+
+    Only the ``max_keys`` most recently seen clients are tracked.
+    """
+
+    def __init__(self, rate: float, burst: int, max_keys: int = 10000):
+        self.rate = rate
+        self.burst = burst
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+
+    async def hit(self, key: str) -> float:
+        """Take a token for ``key``; returns 0 if allowed, else seconds until one is available."""
+        now = time.monotonic()
+        tokens, updated_at = self._buckets.get(key, (self.burst, now))
+        tokens = min(self.burst, tokens + (now - updated_at) * self.rate)
+        retry_after = 0.0
+        if tokens >= 1:
+            tokens -= 1
+        else:
+            retry_after = (1 - tokens) / self.rate
+        self._buckets[key] = (tokens, now)
+        self._buckets.move_to_end(key)
+        while len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+        return retry_after
+
+
+class RedisRateLimiter:
+    """Token buckets shared by all workers; Redis errors let requests through."""
+
+    # Refill and take a token atomically, on Redis' clock so workers agree.
+    HIT_SCRIPT = """
+    local rate = tonumber(ARGV[1])
+    local burst = tonumber(ARGV[2])
+    local clock = redis.call('TIME')
+    local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+    local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+    local tokens = tonumber(state[1]) or burst
+    local ts = tonumber(state[2]) or now
+    tokens = math.min(burst, tokens + math.max(0, now - ts) * rate)
+    local retry_after = 0
+    if tokens >= 1 then
+        tokens = tokens - 1
+    else
+        retry_after = (1 - tokens) / rate
+    end
+    redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+    redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 1)
+    return tostring(retry_after)
+    """
+
+    def __init__(self, namespace: str, rate: float, burst: int, url: str):
+        self.namespace = namespace
+        self.rate = rate
+        self.burst = burst
+        self.client = aioredis.from_url(url)
+        self._hit = self.client.register_script(self.HIT_SCRIPT)
+
+    async def hit(self, key: str) -> float:
+        try:
+            return float(await self._hit(keys=[f"ratelimit:{self.namespace}:{key}"], args=[self.rate, self.burst]))
+        except RedisError as e:
+            print(f"[ERROR] Redis rate limiter failed: {e}")
+            return 0.0
+
+
+def build_rate_limiter(namespace: str, backend: str, per_minute: int, burst: int):
+    rate = per_minute / 60
+    if backend == "memory":
+        return InMemoryRateLimiter(rate, burst)
+    if backend == "redis":
+        return RedisRateLimiter(namespace, rate, burst, settings.RATE_LIMIT_REDIS_URL or settings.REDIS_BROKER_URL)
+    raise ValueError(f"Unknown rate limit backend: {backend}")
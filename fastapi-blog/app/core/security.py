@@ -1,11 +1,34 @@
+import asyncio
+import hashlib
+import uuid
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta
+from typing import Optional, Tuple
+from fastapi import HTTPException, status
 from jose import jwt
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from passlib.context import CryptContext
 from app.core.config import settings
 from app.models.token import RefreshToken
+from app.models.user import User
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Hashes with any other work factor are flagged for rehash on the next login.
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__min_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__max_rounds=settings.BCRYPT_ROUNDS,
+)
+
+_hash_executor: Optional[ProcessPoolExecutor] = None
+_hash_pending = 0
+
+def access_token_claims(user: User) -> dict:
+    claims = {"sub": str(user.id)}
+    if settings.ACCESS_TOKEN_EMBED_CLAIMS:
+        claims.update(username=user.username, email=user.email)
+    return claims
 
 def create_access_token(data: dict, expires_delta: timedelta = None) -> str:
     to_encode = data.copy()
@@ -14,23 +37,29 @@ def create_access_token(data: dict, expires_delta: timedelta = None) -> str:
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
 
-def create_refresh_token(db: Session, user_id: int) -> str:
+def hash_token(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+def create_refresh_token(db: AsyncSession, user_id: int) -> str:
+    """Add a new refresh token row to the session; the caller commits."""
     expire = datetime.utcnow() + timedelta(days=7)
+    jti = uuid.uuid4().hex
     payload = {
         "sub": str(user_id),
+        "jti": jti,
         "exp": expire,
         "iat": datetime.utcnow().timestamp()  
     }
     token = jwt.encode(payload, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
 
     db_token = RefreshToken(
-        token=token,
+        jti=jti,
+        token_hash=hash_token(token),
         user_id=user_id,
         expires_at=expire,
         revoked=False
     )
     db.add(db_token)
-    db.commit()
     return token
 
 
@@ -39,3 +68,43 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
 
 def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
+
+def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """Return whether the password matches and, if the hash is outdated, a new hash."""
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+
+def _get_hash_executor() -> ProcessPoolExecutor:
+    global _hash_executor
+    if _hash_executor is None:
+        _hash_executor = ProcessPoolExecutor(max_workers=settings.PASSWORD_HASH_WORKERS)
+    return _hash_executor
+
+async def _run_in_hash_pool(func, *args):
+    # Reject instead of queueing without bound so a login storm cannot
+    # starve the worker; clients are told to retry shortly.
+    global _hash_pending
+    if _hash_pending >= settings.PASSWORD_HASH_MAX_PENDING:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many concurrent authentication requests",
+            headers={"Retry-After": "1"},
+        )
+    _hash_pending += 1
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_get_hash_executor(), func, *args)
+    finally:
+        _hash_pending -= 1
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    return await _run_in_hash_pool(verify_and_update_password, plain_password, hashed_password)
+
+async def get_password_hash_async(password: str) -> str:
+    return await _run_in_hash_pool(get_password_hash, password)
+
+def shutdown_password_hasher():
+    global _hash_executor
+    if _hash_executor is not None:
+        _hash_executor.shutdown(wait=False, cancel_futures=True)
+        _hash_executor = None
@@ -3,6 +3,10 @@ from app.models.token import RefreshToken
 from app.models.post import Post
 from app.models.comment import Comment
 from app.models.media import Media
+from app.models.media_deletion import MediaDeletion
+from app.models.direct_upload import DirectUpload
+from app.models.subscription import Subscription, NotificationDelivery
+from app.models.outbox import OutboxMessage
 from app.db.base_class import Base
 
 
@@ -0,0 +1,54 @@
+import time
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+
+class InstrumentedPoolMixin:
+    """Records how long checkouts wait for a connection and how many time out.
+
+    The wait includes opening a new connection and the pre-ping, i.e. the
+    latency a request actually sees before its first query.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.checkouts = 0
+        self.timeouts = 0
+        self.checkout_wait_seconds_total = 0.0
+        self.checkout_wait_seconds_max = 0.0
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            return super().connect()
+        except exc.TimeoutError:
+            self.timeouts += 1
+            raise
+        finally:
+            waited = time.perf_counter() - start
+            self.checkouts += 1
+            self.checkout_wait_seconds_total += waited
+            self.checkout_wait_seconds_max = max(self.checkout_wait_seconds_max, waited)
+
+
+class InstrumentedQueuePool(InstrumentedPoolMixin, QueuePool):
+    pass
+
+
+class InstrumentedAsyncAdaptedQueuePool(InstrumentedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def pool_stats(pool) -> dict:
+    """Current occupancy and cumulative checkout timings of a QueuePool."""
+    return {
+        "size": pool.size(),
+        "checked_in": pool.checkedin(),
+        "checked_out": pool.checkedout(),
+        # Connections open beyond pool_size; negative while the pool is still filling.
+        "overflow": pool.overflow(),
+        "checkouts": getattr(pool, "checkouts", 0),
+        "timeouts": getattr(pool, "timeouts", 0),
+        "checkout_wait_seconds_total": round(getattr(pool, "checkout_wait_seconds_total", 0.0), 6),
+        "checkout_wait_seconds_max": round(getattr(pool, "checkout_wait_seconds_max", 0.0), 6),
+    }
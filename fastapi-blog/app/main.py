@@ -1,8 +1,15 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.staticfiles import StaticFiles
 from app.api.v1 import router as api_v1_router
+from app.core.config import settings
+from app.core.media_storage import shutdown_media_uploader
 from app.db.init_db import init_db
-from app.middleware.view_counter import ViewCountMiddleware
+from app.db.session import async_engine
+from app.core.security import shutdown_password_hasher
+from app.websockets.comment_manager import comment_manager
+from app.middleware.view_counter import ViewCountMiddleware, view_counter
+from app.middleware.upload_limit import UploadSizeLimitMiddleware
 
 app = FastAPI(title="FastAPI Blog")
 
@@ -12,13 +19,28 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "Retry-After"],
 )
 
 
 app.add_middleware(ViewCountMiddleware)
+app.add_middleware(UploadSizeLimitMiddleware, max_bytes=settings.MEDIA_MAX_UPLOAD_BYTES)
 
 app.include_router(api_v1_router, prefix="/api/v1")
 
+if settings.MEDIA_STORAGE_BACKEND == "local":
+    app.mount(settings.MEDIA_LOCAL_BASE_URL, StaticFiles(directory=settings.MEDIA_LOCAL_ROOT, check_dir=False), name="media")
+
 @app.on_event("startup")
-def on_startup():
+async def on_startup():
     init_db()
+    view_counter.start()
+    comment_manager.start()
+
+@app.on_event("shutdown")
+async def on_shutdown():
+    await view_counter.stop()
+    await async_engine.dispose()
+    shutdown_password_hasher()
+    shutdown_media_uploader()
+    await comment_manager.close()
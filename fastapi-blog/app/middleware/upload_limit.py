@@ -0,0 +1,62 @@
+from fastapi import status
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+import re
+
+MEDIA_UPLOAD_PATH = re.compile(r"^/api/v1/blog/media/upload/\d+$")
+
+# Room for the multipart boundaries and part headers around the file itself.
+MULTIPART_OVERHEAD_BYTES = 64 * 1024
+
+
+class UploadSizeLimitMiddleware:
+    """Rejects media uploads over ``max_bytes`` before their body is spooled.
+
+    Starlette writes the whole multipart body to a temporary file before the
+    endpoint runs, so the cap has to be applied here: up front from
+    Content-Length, and while streaming for requests without one.
+    """
+
+    def __init__(self, app: ASGIApp, max_bytes: int):
+        self.app = app
+        self.max_bytes = max_bytes + MULTIPART_OVERHEAD_BYTES
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or scope["method"] != "POST" or not MEDIA_UPLOAD_PATH.match(scope["path"]):
+            await self.app(scope, receive, send)
+            return
+
+        content_length = dict(scope["headers"]).get(b"content-length")
+        if content_length is not None and content_length.isdigit() and int(content_length) > self.max_bytes:
+            await _too_large(scope, receive, send)
+            return
+
+        received = 0
+        rejected = False
+
+        async def limited_receive() -> Message:
+            nonlocal received, rejected
+            if rejected:
+                return {"type": "http.disconnect"}
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_bytes:
+                    # Answer now and make the app see a disconnect, which stops
+                    # the form parser; whatever it responds with is discarded.
+                    rejected = True
+                    await _too_large(scope, receive, send)
+                    return {"type": "http.disconnect"}
+            return message
+
+        async def guarded_send(message: Message):
+            if not rejected:
+                await send(message)
+
+        await self.app(scope, limited_receive, guarded_send)
+
+
+async def _too_large(scope: Scope, receive: Receive, send: Send):
+    response = JSONResponse({"detail": "File too large"}, status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+    await response(scope, receive, send)
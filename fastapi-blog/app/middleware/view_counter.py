@@ -1,27 +1,116 @@
 from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.requests import Request
 from starlette.responses import Response
-from sqlalchemy.orm import Session
+from sqlalchemy import update, case, func
+from typing import Dict, Optional
 from app.models import Post
-from app.db.session import SessionLocal
+from app.db.session import AsyncSessionLocal
+from app.core.cache import post_cache
+from app.core.config import settings
 
+import asyncio
 import re
 
+POST_DETAIL_PATH = re.compile(r"^/api/v1/blog/post/(\d+)$")
+
+
+class ViewCountBuffer:
+    """Accumulates post views in memory and writes them to the DB in bulk.
+
+    Increments are aggregated per post id and flushed every ``flush_interval``
+    seconds, or earlier once ``flush_threshold`` views are pending, as a single
+    ``UPDATE posts SET views = views + delta`` statement. Flushed posts are
+    evicted from post_cache so cached payloads pick up the new counts.
+    """
+
+    def __init__(self, flush_interval: float, flush_threshold: int):
+        self.flush_interval = flush_interval
+        self.flush_threshold = flush_threshold
+        self._pending: Dict[int, int] = {}
+        self._pending_total = 0
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    def add(self, post_id: int, count: int = 1):
+        self._pending[post_id] = self._pending.get(post_id, 0) + count
+        self._pending_total += count
+        if self._pending_total >= self.flush_threshold:
+            self._wakeup.set()
+
+    async def flush(self) -> bool:
+        """Write pending views; returns False if the write failed."""
+        if not self._pending:
+            return True
+        pending = self._pending
+        self._pending = {}
+        self._pending_total = 0
+        try:
+            await self._write(pending)
+        except Exception as e:
+            # Keep the deltas so the next flush retries them, without going
+            # through add(): reaching the threshold again must not wake _run
+            # straight back into a DB that is still down.
+            for post_id, count in pending.items():
+                self._pending[post_id] = self._pending.get(post_id, 0) + count
+                self._pending_total += count
+            print(f"[ERROR] Failed to flush view counts: {e}")
+            return False
+        # Cached PostOut payloads carry the view count; drop the ones that moved.
+        await post_cache.delete_many(pending)
+        return True
+
+    async def _write(self, pending: Dict[int, int]):
+        stmt = (
+            update(Post)
+            .where(Post.id.in_(list(pending)))
+            .values(views=func.coalesce(Post.views, 0) + case(pending, value=Post.id, else_=0))
+            .execution_options(synchronize_session=False)
+        )
+        async with AsyncSessionLocal() as db:
+            await db.execute(stmt)
+            await db.commit()
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            if not await self.flush():
+                # New views can still cross the threshold; back off regardless.
+                await asyncio.sleep(self.flush_interval)
+                self._wakeup.clear()
+
+    def start(self):
+        if self._task is None:
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+
+view_counter = ViewCountBuffer(
+    flush_interval=settings.VIEW_COUNT_FLUSH_INTERVAL_SECONDS,
+    flush_threshold=settings.VIEW_COUNT_FLUSH_THRESHOLD,
+)
+
+
 class ViewCountMiddleware(BaseHTTPMiddleware):
     async def dispatch(self, request: Request, call_next):
-        path = request.url.path
-        method = request.method
-
-        match = re.match(r"^/api/v1/blog/post/(\d+)$", path)
-        if match and method == "GET":
-            post_id = int(match.group(1))
-            # Tạo session DB để cập nhật
-            db: Session = SessionLocal()
-            post = db.query(Post).filter(Post.id == post_id).first()
-            if post:
-                post.views += 1
-                db.commit()
-            db.close()
-
         response: Response = await call_next(request)
+
+        if request.method == "GET" and response.status_code == 200:
+            match = POST_DETAIL_PATH.match(request.url.path)
+            if match:
+                view_counter.add(int(match.group(1)))
+
         return response
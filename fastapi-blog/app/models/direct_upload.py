@@ -0,0 +1,20 @@
+from sqlalchemy import Column, Integer, String, DateTime
+from datetime import datetime
+from app.db.base_class import Base
+
+class DirectUpload(Base):
+    """A signature handed out for a direct upload to Cloudinary, until it is confirmed.
+
+    Rows still here at ``expires_at`` belong to uploads that were never
+    confirmed; the expire_direct_uploads task moves them to media_deletions.
+    post_id is not a foreign key so the row outlives a deleted post and the
+    file still gets cleaned up.
+    """
+    __tablename__ = "direct_uploads"
+
+    id = Column(Integer, primary_key=True, index=True)
+    public_id = Column(String, nullable=False, unique=True)
+    resource_type = Column(String, nullable=False)
+    post_id = Column(Integer, nullable=False)
+    expires_at = Column(DateTime, nullable=False, index=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
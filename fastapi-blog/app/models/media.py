@@ -1,16 +1,28 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, UniqueConstraint
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.db.base_class import Base
+from app.core.config import settings
+from app.core.cloudinary_service import media_variant_urls
 
 class Media(Base):
     __tablename__ = "media"
+    __table_args__ = (
+        UniqueConstraint("public_id", name="uq_media_public_id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     url = Column(String, nullable=False)
-    public_id = Column(String, nullable=False) 
+    public_id = Column(String, nullable=False)
     media_type = Column(String, nullable=False) 
     post_id = Column(Integer, ForeignKey('posts.id', ondelete='CASCADE'), nullable=False)
     uploaded_at = Column(DateTime, default=datetime.utcnow)
 
     post = relationship("Post", back_populates="medias")
+
+    @property
+    def variants(self):
+        # Derived from public_id rather than stored, so new variants apply to old uploads.
+        if settings.MEDIA_STORAGE_BACKEND != "cloudinary":
+            return {}
+        return media_variant_urls(self.public_id, self.media_type)
@@ -0,0 +1,18 @@
+from sqlalchemy import Column, Integer, String, DateTime
+from datetime import datetime
+from app.db.base_class import Base
+
+class MediaDeletion(Base):
+    """Outbox of stored files to remove once the Media rows are gone.
+
+    Rows are written in the same transaction as the delete and drained by the
+    delete_media_files Celery task. Rows that reached MEDIA_DELETION_MAX_ATTEMPTS
+    are dead letters: skipped by the task and kept for manual cleanup.
+    """
+    __tablename__ = "media_deletions"
+
+    id = Column(Integer, primary_key=True, index=True)
+    public_id = Column(String, nullable=False)
+    resource_type = Column(String, nullable=False)
+    attempts = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime, default=datetime.utcnow)
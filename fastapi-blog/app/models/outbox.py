@@ -0,0 +1,16 @@
+from sqlalchemy import Column, Integer, String, DateTime, JSON
+from datetime import datetime
+from app.db.base_class import Base
+
+class OutboxMessage(Base):
+    """A Celery task to publish once the transaction that wrote it commits.
+
+    The relay_outbox task sends pending rows to the broker and deletes them.
+    """
+    __tablename__ = "outbox_messages"
+
+    id = Column(Integer, primary_key=True, index=True)
+    task = Column(String(255), nullable=False)
+    args = Column(JSON, nullable=False, default=list)
+    kwargs = Column(JSON, nullable=False, default=dict)
+    created_at = Column(DateTime, default=datetime.utcnow)
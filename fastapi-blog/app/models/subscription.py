@@ -0,0 +1,29 @@
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, UniqueConstraint
+from datetime import datetime
+from app.db.base_class import Base
+
+class Subscription(Base):
+    __tablename__ = "subscriptions"
+    __table_args__ = (
+        # Also the keyset index the notification fan-out walks for an author.
+        UniqueConstraint("author_id", "subscriber_id", name="uq_subscriptions_author_id_subscriber_id"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    author_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    subscriber_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+
+class NotificationDelivery(Base):
+    """One row per notification already sent to a user, so task retries skip them."""
+    __tablename__ = "notification_deliveries"
+    __table_args__ = (
+        UniqueConstraint("notification_key", "user_id", name="uq_notification_deliveries_key_user_id"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    notification_key = Column(String(64), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    # Indexed for the retention purge.
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
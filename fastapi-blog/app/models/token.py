@@ -1,13 +1,22 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, Boolean, DateTime
+from sqlalchemy import Column, Integer, String, ForeignKey, Boolean, DateTime, Index, text
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.db.base_class import Base
 
 class RefreshToken(Base):
     __tablename__ = "refresh_tokens"
+    __table_args__ = (
+        # purge_refresh_tokens matches "revoked OR expires_at < now"; the two
+        # indexes let each batch avoid a full scan (bitmap OR on Postgres).
+        Index("ix_refresh_tokens_expires_at", "expires_at"),
+        Index("ix_refresh_tokens_revoked", "id", postgresql_where=text("revoked"), sqlite_where=text("revoked")),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
-    token = Column(String, unique=True, nullable=False)
+    # The JWT itself is never stored: rows are found by its jti claim and
+    # checked against the SHA-256 of the presented token.
+    jti = Column(String(32), unique=True, nullable=False)
+    token_hash = Column(String(64), nullable=False)
     user_id = Column(Integer, ForeignKey("users.id"))
     user = relationship("User", back_populates="refresh_tokens")
     revoked = Column(Boolean, default=False)
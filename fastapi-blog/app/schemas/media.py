@@ -1,5 +1,6 @@
 from pydantic import BaseModel
 from datetime import datetime
+from typing import Dict, Literal
 
 class MediaBase(BaseModel):
     url: str
@@ -8,9 +9,28 @@ class MediaBase(BaseModel):
 class MediaCreate(BaseModel):
     pass 
 
+MediaVariant = Literal["thumbnail", "medium", "webp", "avif"]
+MediaResourceType = Literal["image", "video", "raw"]
+
 class MediaOut(MediaBase):
     id: int
     uploaded_at: datetime
+    # Variant name -> URL; empty for media types without variants.
+    variants: Dict[str, str] = {}
 
     class Config:
         from_attributes = True
+
+class MediaUploadSignature(BaseModel):
+    upload_url: str
+    api_key: str
+    public_id: str
+    timestamp: int
+    signature: str
+    resource_type: MediaResourceType
+
+class MediaUploadConfirm(BaseModel):
+    # Copied from Cloudinary's upload response.
+    public_id: str
+    version: int
+    signature: str
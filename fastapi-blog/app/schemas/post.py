@@ -27,3 +27,18 @@ class PostOut(PostBase):
 
     class Config:
         from_attributes = True
+
+class PostSummaryOut(BaseModel):
+    id: int
+    title: str
+    views: int
+    author_id: Optional[int]
+    author_username: Optional[str]
+    category_id: Optional[int]
+    category_name: Optional[str]
+    comment_count: int
+    media_count: int
+    thumbnail_url: Optional[str]
+
+    class Config:
+        from_attributes = True
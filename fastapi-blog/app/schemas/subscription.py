@@ -0,0 +1,10 @@
+from pydantic import BaseModel
+from datetime import datetime
+
+class SubscriptionOut(BaseModel):
+    author_id: int
+    subscriber_id: int
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
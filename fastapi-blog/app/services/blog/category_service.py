@@ -1,38 +1,44 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.cache import post_cache
 from app.models.category import Category
 from app.schemas.category import CategoryCreate, CategoryUpdate
 from fastapi import HTTPException, status
 
-def create_category(db: Session, category_in: CategoryCreate):
-    existing = db.query(Category).filter(Category.name == category_in.name).first()
-    if existing:
+async def create_category(db: AsyncSession, category_in: CategoryCreate):
+    result = await db.execute(select(Category).where(Category.name == category_in.name))
+    if result.scalar_one_or_none():
         raise HTTPException(status_code=400, detail="Category already exists")
 
     category = Category(**category_in.dict())
     db.add(category)
-    db.commit()
-    db.refresh(category)
+    await db.commit()
+    await db.refresh(category)
     return category
 
-def get_category(db: Session, category_id: int):
-    category = db.query(Category).filter(Category.id == category_id).first()
+async def get_category(db: AsyncSession, category_id: int):
+    category = await db.get(Category, category_id)
     if not category:
         raise HTTPException(status_code=404, detail="Category not found")
     return category
 
-def update_category(db: Session, category_id: int, category_in: CategoryUpdate):
-    category = get_category(db, category_id)
+async def update_category(db: AsyncSession, category_id: int, category_in: CategoryUpdate):
+    category = await get_category(db, category_id)
     for field, value in category_in.dict().items():
         setattr(category, field, value)
-    db.commit()
-    db.refresh(category)
+    await db.commit()
+    await db.refresh(category)
+    # Cached post payloads embed their category.
+    await post_cache.clear()
     return category
 
-def delete_category(db: Session, category_id: int):
-    category = get_category(db, category_id)
-    db.delete(category)
-    db.commit()
+async def delete_category(db: AsyncSession, category_id: int):
+    category = await get_category(db, category_id)
+    await db.delete(category)
+    await db.commit()
+    await post_cache.clear()
     return {"message": "Category deleted"}
 
-def list_categories(db: Session):
-    return db.query(Category).all()
+async def list_categories(db: AsyncSession):
+    result = await db.execute(select(Category))
+    return result.scalars().all()
@@ -1,19 +1,49 @@
-from sqlalchemy.orm import Session
+from datetime import datetime
+from typing import Optional
+from sqlalchemy import select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import HTTPException
+from app.core.pagination import decode_cursor
 from app.models.comment import Comment
 from app.models.post import Post
 from app.schemas.comment import CommentCreate, CommentUpdate
 from app.models.user import User
+from app.core.cache import post_cache
 from app.websockets.comment_manager import comment_manager
 
-def get_comments_by_post(post_id: int, db: Session):
-    post = db.query(Post).filter(Post.id == post_id).first()
-    if not post:
+def comment_cursor(comment: Comment) -> dict:
+    return {"created_at": comment.created_at.isoformat(), "id": comment.id}
+
+
+def _decode_comment_cursor(cursor: str):
+    values = decode_cursor(cursor)
+    try:
+        return datetime.fromisoformat(values["created_at"]), int(values["id"])
+    except (KeyError, TypeError, ValueError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+async def get_comments_by_post(post_id: int, db: AsyncSession, limit: int = 20, cursor: Optional[str] = None, order: str = "newest"):
+    # Served by ix_comments_post_id_created_at_id, scanned forwards or backwards.
+    key = tuple_(Comment.created_at, Comment.id)
+    query = select(Comment).where(Comment.post_id == post_id)
+    if cursor:
+        after = tuple_(*_decode_comment_cursor(cursor))
+        query = query.where(key < after if order == "newest" else key > after)
+    if order == "newest":
+        query = query.order_by(Comment.created_at.desc(), Comment.id.desc())
+    else:
+        query = query.order_by(Comment.created_at, Comment.id)
+    result = await db.execute(query.limit(limit))
+    comments = result.scalars().all()
+
+    # Only an empty first page needs to tell "no comments" from "no post".
+    if not comments and not cursor and not await db.get(Post, post_id):
         raise HTTPException(status_code=404, detail="Post not found")
-    return post.comments
+    return comments
 
-async def create_comment(post_id: int, comment: CommentCreate, db: Session, current_user: User):
-    post = db.query(Post).filter(Post.id == post_id).first()
+async def create_comment(post_id: int, comment: CommentCreate, db: AsyncSession, current_user: User):
+    post = await db.get(Post, post_id)
     if not post:
         raise HTTPException(status_code=404, detail="Post not found")
 
@@ -23,8 +53,9 @@ async def create_comment(post_id: int, comment: CommentCreate, db: Session, curr
         author_id=current_user.id
     )
     db.add(new_comment)
-    db.commit()
-    db.refresh(new_comment)
+    await db.commit()
+    await db.refresh(new_comment)
+    await post_cache.delete(post_id)
 
     await comment_manager.broadcast(post_id, {
         "type": "new_comment",
@@ -38,16 +69,17 @@ async def create_comment(post_id: int, comment: CommentCreate, db: Session, curr
 
     return new_comment
 
-async def update_comment(comment_id: int, comment_data: CommentUpdate, db: Session, current_user: User):
-    comment = db.query(Comment).filter(Comment.id == comment_id).first()
+async def update_comment(comment_id: int, comment_data: CommentUpdate, db: AsyncSession, current_user: User):
+    comment = await db.get(Comment, comment_id)
     if not comment:
         raise HTTPException(status_code=404, detail="Comment not found")
     if comment.author_id != current_user.id:
         raise HTTPException(status_code=403, detail="Not authorized to edit this comment")
 
     comment.content = comment_data.content
-    db.commit()
-    db.refresh(comment)
+    await db.commit()
+    await db.refresh(comment)
+    await post_cache.delete(comment.post_id)
 
     await comment_manager.broadcast(comment.post_id, {
         "type": "update_comment",
@@ -61,15 +93,16 @@ async def update_comment(comment_id: int, comment_data: CommentUpdate, db: Sessi
 
     return comment
 
-async def delete_comment(comment_id: int, db: Session, current_user: User):
-    comment = db.query(Comment).filter(Comment.id == comment_id).first()
+async def delete_comment(comment_id: int, db: AsyncSession, current_user: User):
+    comment = await db.get(Comment, comment_id)
     if not comment:
         raise HTTPException(status_code=404, detail="Comment not found")
     if comment.author_id != current_user.id:
         raise HTTPException(status_code=403, detail="Not authorized to delete this comment")
 
-    db.delete(comment)
-    db.commit()
+    await db.delete(comment)
+    await db.commit()
+    await post_cache.delete(comment.post_id)
 
     await comment_manager.broadcast(comment.post_id, {
         "type": "delete_comment",
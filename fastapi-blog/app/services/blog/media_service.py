@@ -1,18 +1,54 @@
+import uuid
+from datetime import datetime, timedelta
+from typing import Optional
 from fastapi import UploadFile, HTTPException
-from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 from app.models.media import Media
+from app.models.media_deletion import MediaDeletion
+from app.models.direct_upload import DirectUpload
 from app.models.post import Post
 from app.models.user import User
-from app.core.cloudinary_service import upload_media_to_cloudinary, delete_media_from_cloudinary
+from app.schemas.media import MediaOut, MediaResourceType, MediaUploadConfirm, MediaVariant
+from app.core.cache import post_cache
+from app.core.config import settings
+from app.core.cloudinary_service import (
+    fetch_uploaded_resource,
+    media_url,
+    sign_direct_upload,
+    upload_media_to_cloudinary,
+    verify_direct_upload,
+)
+from app.core.media_storage import run_upload, save_media_locally
 
-def upload_media(post_id: int, file: UploadFile, db: Session, current_user: User):
-    post = db.query(Post).filter(Post.id == post_id).first()
+async def _get_own_post(post_id: int, db: AsyncSession, current_user: User) -> Post:
+    post = await db.get(Post, post_id)
     if not post:
         raise HTTPException(status_code=404, detail="Post not found")
     if post.author_id != current_user.id:
         raise HTTPException(status_code=403, detail="Not authorized")
+    return post
 
-    upload_result = upload_media_to_cloudinary(file.file)
+async def _get_media_by_public_id(public_id: str, db: AsyncSession) -> Optional[Media]:
+    result = await db.execute(select(Media).where(Media.public_id == public_id))
+    return result.scalar_one_or_none()
+
+def _direct_upload_prefix(post_id: int) -> str:
+    return f"media/{post_id}/"
+
+async def upload_media(post_id: int, file: UploadFile, db: AsyncSession, current_user: User):
+    await _get_own_post(post_id, db, current_user)
+
+    # UploadSizeLimitMiddleware already bounded the request body; this checks
+    # the file part alone, whose size Starlette counted while spooling it.
+    if file.size > settings.MEDIA_MAX_UPLOAD_BYTES:
+        raise HTTPException(status_code=413, detail="File too large")
+
+    upload = save_media_locally if settings.MEDIA_STORAGE_BACKEND == "local" else upload_media_to_cloudinary
+    upload_result = await run_upload(upload, file.file, filename=file.filename)
 
     media = Media(
         url=upload_result["url"],
@@ -21,30 +57,106 @@ def upload_media(post_id: int, file: UploadFile, db: Session, current_user: User
         post_id=post_id
     )
     db.add(media)
-    db.commit()
-    db.refresh(media)
+    await db.commit()
+    await db.refresh(media)
+    await post_cache.delete(post_id)
+    return media
+
+async def sign_media_upload(post_id: int, resource_type: MediaResourceType, db: AsyncSession, current_user: User):
+    """Let the client upload straight to Cloudinary; the bytes never reach this API.
+
+    The signed public_id is recorded so the upload is deleted if it is never confirmed.
+    """
+    await _get_own_post(post_id, db, current_user)
+    if settings.MEDIA_STORAGE_BACKEND != "cloudinary":
+        raise HTTPException(status_code=400, detail="Direct uploads require Cloudinary storage")
+    public_id = _direct_upload_prefix(post_id) + uuid.uuid4().hex
+    db.add(DirectUpload(
+        public_id=public_id,
+        resource_type=resource_type,
+        post_id=post_id,
+        expires_at=datetime.utcnow() + timedelta(seconds=settings.MEDIA_DIRECT_UPLOAD_EXPIRY_SECONDS),
+    ))
+    await db.commit()
+    return sign_direct_upload(public_id, resource_type)
+
+async def confirm_media_upload(post_id: int, upload: MediaUploadConfirm, db: AsyncSession, current_user: User):
+    await _get_own_post(post_id, db, current_user)
+    if not upload.public_id.startswith(_direct_upload_prefix(post_id)):
+        raise HTTPException(status_code=400, detail="Upload does not belong to this post")
+    if not verify_direct_upload(upload.public_id, upload.version, upload.signature):
+        raise HTTPException(status_code=400, detail="Invalid upload signature")
+
+    # Confirming twice (e.g. a client retry) returns the same row.
+    media = await _get_media_by_public_id(upload.public_id, db)
+    if media:
+        return media
+
+    result = await db.execute(select(DirectUpload).where(DirectUpload.public_id == upload.public_id))
+    direct_upload = result.scalar_one_or_none()
+    if direct_upload is None:
+        raise HTTPException(status_code=400, detail="Upload expired or was never signed")
+
+    # The upload went straight to Cloudinary, so its size is only known there.
+    resource = await run_in_threadpool(fetch_uploaded_resource, upload.public_id, direct_upload.resource_type)
+    if resource is None:
+        raise HTTPException(status_code=400, detail="Upload not found")
+    if resource["bytes"] > settings.MEDIA_MAX_UPLOAD_BYTES:
+        db.add(MediaDeletion(public_id=upload.public_id, resource_type=direct_upload.resource_type))
+        await db.delete(direct_upload)
+        await db.commit()
+        raise HTTPException(status_code=413, detail="File too large")
+
+    media = Media(
+        url=media_url(upload.public_id, direct_upload.resource_type, upload.version),
+        public_id=upload.public_id,
+        media_type=direct_upload.resource_type,
+        post_id=post_id
+    )
+    db.add(media)
+    await db.delete(direct_upload)
+    try:
+        await db.commit()
+    except IntegrityError:
+        # A concurrent confirm of the same upload inserted it first.
+        await db.rollback()
+        return await _get_media_by_public_id(upload.public_id, db)
+    await db.refresh(media)
+    await post_cache.delete(post_id)
     return media
 
-def get_media(media_id: int, db: Session):
-    media = db.query(Media).filter(Media.id == media_id).first()
+async def get_media(media_id: int, db: AsyncSession, variant: Optional[MediaVariant] = None):
+    media = await db.get(Media, media_id)
     if not media:
         raise HTTPException(status_code=404, detail="Media not found")
-    return media
+    if variant is None:
+        return media
+    # Media without that variant (e.g. raw files) keep their original url.
+    media_out = MediaOut.model_validate(media)
+    media_out.url = media_out.variants.get(variant, media_out.url)
+    return media_out
 
-def delete_media(media_id: int, db: Session, current_user: User):
-    media = db.query(Media).filter(Media.id == media_id).first()
+async def delete_media(media_id: int, db: AsyncSession, current_user: User):
+    result = await db.execute(
+        select(Media).options(selectinload(Media.post)).where(Media.id == media_id)
+    )
+    media = result.scalar_one_or_none()
     if not media:
         raise HTTPException(status_code=404, detail="Media not found")
     if media.post.author_id != current_user.id:
         raise HTTPException(status_code=403, detail="Not authorized")
 
-    db.delete(media)
-    db.commit()
+    await db.delete(media)
+    await db.commit()
+    await post_cache.delete(media.post_id)
     return {"message": "Media deleted successfully"}
 
 def handle_media_before_delete(mapper, connection, target):
+    # Only queue the file here; removing it is a remote call that must not
+    # run inside the transaction. The row commits or rolls back with the
+    # delete and is picked up by the delete_media_files beat sweep, so the
+    # request never talks to the broker.
     if target.public_id:
-        try:
-            delete_media_from_cloudinary(target.public_id, target.media_type)
-        except Exception as e:
-            print(f"[ERROR] Failed to delete from Cloudinary: {e}")
+        connection.execute(
+            insert(MediaDeletion).values(public_id=target.public_id, resource_type=target.media_type)
+        )
@@ -1,49 +1,157 @@
 # app/services/blog/post_service.py
 
-from sqlalchemy.orm import Session, selectinload
-from sqlalchemy import or_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased, selectinload
+from sqlalchemy import select, or_, func, literal_column
+from typing import Optional
 from fastapi import HTTPException
+from app.core.cache import post_cache
+from app.core.config import settings
+from app.core.cloudinary_service import media_variant_urls
+from app.core.pagination import decode_cursor
 from app.models.post import Post
 from app.models.user import User
-from app.schemas.post import PostCreate, PostUpdate
-from app.workers.tasks import send_notification_email
+from app.models.comment import Comment
+from app.models.media import Media
+from app.models.category import Category
+from app.schemas.post import PostCreate, PostUpdate, PostOut, PostSummaryOut
+from app.services.notifications.outbox_service import add_outbox_message
+from app.workers.tasks import fan_out_post_notification
 
 
-def list_posts(search: str, category_id: int, limit: int, offset: int, db: Session):
-    query = db.query(Post).options(
+def _post_detail_query():
+    return select(Post).options(
         selectinload(Post.author),
         selectinload(Post.comments),
         selectinload(Post.medias),
         selectinload(Post.category)
-    )
-
-    if search:
-        query = query.filter(or_(
+    ).execution_options(populate_existing=True)
+
+
+# Must match the expression of the ix_posts_search GIN index for Postgres to use it.
+POST_SEARCH_VECTOR = literal_column(
+    "to_tsvector('english'::regconfig, coalesce(posts.title, '') || ' ' || coalesce(posts.content, ''))"
+)
+
+
+def _filter_posts(query, search: str, category_id: int, limit: int, offset: int, cursor: Optional[str], dialect: str):
+    if search and cursor:
+        raise HTTPException(status_code=400, detail="Cursor pagination is not supported with search")
+
+    if search and dialect == "postgresql":
+        ts_query = func.websearch_to_tsquery(literal_column("'english'::regconfig"), search)
+        matches = POST_SEARCH_VECTOR.op("@@")(ts_query)
+        if settings.POST_SEARCH_TRIGRAM_FALLBACK:
+            # Substring matches are served by the pg_trgm indexes and rank last.
+            matches = or_(
+                matches,
+                Post.title.ilike(f"%{search}%"),
+                Post.content.ilike(f"%{search}%")
+            )
+        query = query.where(matches)\
+            .order_by(func.ts_rank(POST_SEARCH_VECTOR, ts_query).desc(), Post.id.desc())
+    elif search:
+        query = query.where(or_(
             Post.title.ilike(f"%{search}%"),
             Post.content.ilike(f"%{search}%")
-        ))
+        )).order_by(Post.id.desc())
+    else:
+        query = query.order_by(Post.id.desc())
 
     if category_id:
-        query = query.filter(Post.category_id == category_id)
-
-    return query.offset(offset).limit(limit).all()
-
-
-def get_post_by_id(post_id: int, db: Session):
-    post = db.query(Post)\
-        .options(
-            selectinload(Post.author),
-            selectinload(Post.comments),
-            selectinload(Post.medias),
-            selectinload(Post.category)
-        )\
-        .filter(Post.id == post_id).first()
+        query = query.where(Post.category_id == category_id)
+
+    # Keyset pagination: continue strictly after the last id of the previous page.
+    if cursor:
+        last_id = decode_cursor(cursor).get("id")
+        if not isinstance(last_id, int):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        query = query.where(Post.id < last_id)
+    else:
+        query = query.offset(offset)
+
+    return query.limit(limit)
+
+
+async def list_posts(search: str, category_id: int, limit: int, offset: int, db: AsyncSession, cursor: Optional[str] = None):
+    query = _filter_posts(_post_detail_query(), search, category_id, limit, offset, cursor, db.bind.dialect.name)
+    result = await db.execute(query)
+    return result.scalars().all()
+
+
+async def list_post_summaries(search: str, category_id: int, limit: int, offset: int, db: AsyncSession, cursor: Optional[str] = None):
+    # Per-post aggregates are correlated subqueries, so they are only evaluated
+    # for the rows on the requested page, all in a single round-trip.
+    comment_count = select(func.count(Comment.id))\
+        .where(Comment.post_id == Post.id)\
+        .scalar_subquery()
+    media_count = select(func.count(Media.id))\
+        .where(Media.post_id == Post.id)\
+        .scalar_subquery()
+    # The first image or video is the cover; its thumbnail variant is built from public_id.
+    cover = aliased(Media)
+    cover_id = select(Media.id)\
+        .where(Media.post_id == Post.id, Media.media_type.in_(("image", "video")))\
+        .order_by(Media.id)\
+        .limit(1)\
+        .scalar_subquery()
+
+    query = select(
+        Post.id,
+        Post.title,
+        func.coalesce(Post.views, 0).label("views"),
+        Post.author_id,
+        User.username.label("author_username"),
+        Post.category_id,
+        Category.name.label("category_name"),
+        comment_count.label("comment_count"),
+        media_count.label("media_count"),
+        cover.public_id.label("cover_public_id"),
+        cover.media_type.label("cover_media_type"),
+        cover.url.label("cover_url"),
+    )\
+        .outerjoin(User, User.id == Post.author_id)\
+        .outerjoin(Category, Category.id == Post.category_id)\
+        .outerjoin(cover, cover.id == cover_id)
+
+    result = await db.execute(_filter_posts(query, search, category_id, limit, offset, cursor, db.bind.dialect.name))
+    summaries = []
+    for row in result.mappings():
+        summary = dict(row)
+        public_id, media_type, url = summary.pop("cover_public_id"), summary.pop("cover_media_type"), summary.pop("cover_url")
+        summary["thumbnail_url"] = _thumbnail_url(public_id, media_type, url)
+        summaries.append(PostSummaryOut(**summary))
+    return summaries
+
+
+def _thumbnail_url(public_id: Optional[str], media_type: Optional[str], url: Optional[str]) -> Optional[str]:
+    if public_id is None:
+        return None
+    # Local storage has no transformations, so it can only serve the original.
+    if settings.MEDIA_STORAGE_BACKEND != "cloudinary":
+        return url
+    return media_variant_urls(public_id, media_type)["thumbnail"]
+
+
+async def get_post_by_id(post_id: int, db: AsyncSession):
+    result = await db.execute(_post_detail_query().where(Post.id == post_id))
+    post = result.scalar_one_or_none()
     if not post:
         raise HTTPException(status_code=404, detail="Post not found")
     return post
 
 
-def create_post(post_data: PostCreate, db: Session, current_user: User):
+async def get_post_payload(post_id: int, db: AsyncSession) -> bytes:
+    """Serialized PostOut for a post, served from post_cache when possible."""
+    payload = await post_cache.get(post_id)
+    if payload is None:
+        post = await get_post_by_id(post_id, db)
+        payload = PostOut.model_validate(post).model_dump_json().encode()
+        await post_cache.set(post_id, payload)
+    return payload
+
+
+async def create_post(post_data: PostCreate, db: AsyncSession, current_user: User):
     new_post = Post(
         title=post_data.title,
         content=post_data.content,
@@ -52,20 +160,15 @@ def create_post(post_data: PostCreate, db: Session, current_user: User):
         category_id=post_data.category_id
     )
     db.add(new_post)
-    db.commit()
-    db.refresh(new_post)
+    await db.flush()
+    add_outbox_message(db, fan_out_post_notification, args=[new_post.id])
+    await db.commit()
 
-    send_notification_email.delay(
-        to_email="admin@example.com",
-        subject=f"New Post by {current_user.email}",
-        content=f"Title: {new_post.title}\n\n{new_post.content}"
-    )
+    return await get_post_by_id(new_post.id, db)
 
-    return new_post
 
-
-def update_post(post_id: int, post_data: PostUpdate, db: Session, current_user: User):
-    post = db.query(Post).filter(Post.id == post_id).first()
+async def update_post(post_id: int, post_data: PostUpdate, db: AsyncSession, current_user: User):
+    post = await db.get(Post, post_id)
     if not post:
         raise HTTPException(status_code=404, detail="Post not found")
     if post.author_id != current_user.id:
@@ -74,17 +177,18 @@ def update_post(post_id: int, post_data: PostUpdate, db: Session, current_user:
     post.title = post_data.title
     post.content = post_data.content
     post.category_id = post_data.category_id
-    db.commit()
-    db.refresh(post)
-    return post
+    await db.commit()
+    await post_cache.delete(post_id)
+    return await get_post_by_id(post_id, db)
 
 
-def delete_post(post_id: int, db: Session, current_user: User):
-    post = db.query(Post).filter(Post.id == post_id).first()
+async def delete_post(post_id: int, db: AsyncSession, current_user: User):
+    post = await db.get(Post, post_id)
     if not post:
         raise HTTPException(status_code=404, detail="Post not found")
     if post.author_id != current_user.id:
         raise HTTPException(status_code=403, detail="Not authorized")
 
-    db.delete(post)
-    db.commit()
+    await db.delete(post)
+    await db.commit()
+    await post_cache.delete(post_id)
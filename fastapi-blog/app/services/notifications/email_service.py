@@ -1,6 +1,53 @@
+import math
+from typing import Optional
+from fastapi import HTTPException, status
+from redis import asyncio as aioredis
+from redis.exceptions import RedisError
+from app.core.config import settings
+from app.core.rate_limit import build_rate_limiter
 from app.schemas.email import EmailRequest
 from app.workers.tasks import send_notification_email
 
+email_rate_limiter = build_rate_limiter(
+    "email",
+    settings.EMAIL_RATE_LIMIT_BACKEND,
+    per_minute=settings.EMAIL_RATE_LIMIT_PER_MINUTE,
+    burst=settings.EMAIL_RATE_LIMIT_BURST,
+)
+_broker_client: Optional[aioredis.Redis] = None
+
+async def get_email_queue_depth() -> int:
+    """Messages waiting in the Celery queue (a Redis list named after the queue)."""
+    global _broker_client
+    if _broker_client is None:
+        _broker_client = aioredis.from_url(settings.REDIS_BROKER_URL)
+    return await _broker_client.llen(settings.EMAIL_QUEUE_NAME)
+
+async def admit_email_request(client_key: str):
+    """Reject the request before it reaches the broker when the queue or the client is over its limit.
+
+    The queue is checked first so that 503s do not use up the client's burst.
+    """
+    try:
+        depth = await get_email_queue_depth()
+    except RedisError as e:
+        print(f"[ERROR] Failed to read email queue depth: {e}")
+        depth = None
+    if depth is None or depth >= settings.EMAIL_QUEUE_MAX_DEPTH:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Email queue is unavailable or backed up",
+            headers={"Retry-After": "30"},
+        )
+
+    retry_after = await email_rate_limiter.hit(client_key)
+    if retry_after:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many email requests",
+            headers={"Retry-After": str(math.ceil(retry_after))},
+        )
+
 def send_email_async(payload: EmailRequest):
     send_notification_email.delay(
         to_email=payload.to_email,
@@ -0,0 +1,11 @@
+from typing import Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.outbox import OutboxMessage
+
+def add_outbox_message(db: AsyncSession, task, args: Optional[list] = None, kwargs: Optional[dict] = None):
+    """Queue ``task`` in the caller's transaction instead of calling .delay().
+
+    Nothing is published if the transaction rolls back, and the request never
+    waits on the broker.
+    """
+    db.add(OutboxMessage(task=task.name, args=args or [], kwargs=kwargs or {}))
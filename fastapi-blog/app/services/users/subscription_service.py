@@ -0,0 +1,48 @@
+from sqlalchemy import delete, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi import HTTPException
+
+from app.models.subscription import Subscription
+from app.models.user import User
+
+
+async def _get_subscription(author_id: int, subscriber_id: int, db: AsyncSession):
+    result = await db.execute(select(Subscription).where(
+        Subscription.author_id == author_id,
+        Subscription.subscriber_id == subscriber_id
+    ))
+    return result.scalar_one_or_none()
+
+
+async def subscribe(author_id: int, db: AsyncSession, current_user: User) -> Subscription:
+    if author_id == current_user.id:
+        raise HTTPException(status_code=400, detail="Cannot subscribe to yourself")
+    if not await db.get(User, author_id):
+        raise HTTPException(status_code=404, detail="User not found")
+
+    # Subscribing twice is a no-op that returns the existing subscription.
+    subscription = await _get_subscription(author_id, current_user.id, db)
+    if subscription:
+        return subscription
+
+    subscription = Subscription(author_id=author_id, subscriber_id=current_user.id)
+    db.add(subscription)
+    try:
+        await db.commit()
+    except IntegrityError:
+        # A concurrent request subscribed first.
+        await db.rollback()
+        return await _get_subscription(author_id, current_user.id, db)
+    await db.refresh(subscription)
+    return subscription
+
+
+async def unsubscribe(author_id: int, db: AsyncSession, current_user: User):
+    result = await db.execute(delete(Subscription).where(
+        Subscription.author_id == author_id,
+        Subscription.subscriber_id == current_user.id
+    ))
+    await db.commit()
+    if not result.rowcount:
+        raise HTTPException(status_code=404, detail="Subscription not found")
@@ -1,5 +1,7 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime
+from typing import Optional
 from jose import jwt, JWTError
 from fastapi import HTTPException
 
@@ -7,37 +9,46 @@ from app.models.user import User
 from app.models.token import RefreshToken
 from app.schemas.user import UserCreate, RefreshTokenRequest, Token
 from app.core.security import (
-    get_password_hash, verify_password,
-    create_access_token, create_refresh_token
+    get_password_hash_async, verify_password_async,
+    create_access_token, create_refresh_token, access_token_claims,
+    hash_token
 )
 from app.core.config import settings
 
 
-def register_user(user_data: UserCreate, db: Session) -> User:
-    existing = db.query(User).filter(
+async def register_user(user_data: UserCreate, db: AsyncSession) -> User:
+    result = await db.execute(select(User).where(
         (User.email == user_data.email) | (User.username == user_data.username)
-    ).first()
-    if existing:
+    ))
+    if result.first():
         raise HTTPException(status_code=400, detail="User already exists")
 
     new_user = User(
         username=user_data.username,
         email=user_data.email,
-        hashed_password=get_password_hash(user_data.password)
+        hashed_password=await get_password_hash_async(user_data.password)
     )
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    await db.commit()
+    await db.refresh(new_user)
     return new_user
 
 
-def authenticate_user(username: str, password: str, db: Session) -> Token:
-    user = db.query(User).filter(User.username == username).first()
-    if not user or not verify_password(password, user.hashed_password):
+async def authenticate_user(username: str, password: str, db: AsyncSession) -> Token:
+    result = await db.execute(select(User).where(User.username == username))
+    user = result.scalar_one_or_none()
+    if not user:
         raise HTTPException(status_code=401, detail="Invalid credentials")
+    valid, new_hash = await verify_password_async(password, user.hashed_password)
+    if not valid:
+        raise HTTPException(status_code=401, detail="Invalid credentials")
+    if new_hash:
+        # Work factor changed since this hash was made; committed with the refresh token.
+        user.hashed_password = new_hash
 
-    access_token = create_access_token(data={"sub": str(user.id)})
+    access_token = create_access_token(data=access_token_claims(user))
     refresh_token = create_refresh_token(db, user.id)
+    await db.commit()
 
     return Token(
         access_token=access_token,
@@ -46,22 +57,52 @@ def authenticate_user(username: str, password: str, db: Session) -> Token:
     )
 
 
-def refresh_user_token(data: RefreshTokenRequest, db: Session) -> Token:
+def _revoke_refresh_token(token: str, jti: str):
+    """UPDATE that revokes the stored token and returns its user_id in one statement."""
+    return update(RefreshToken)\
+        .where(RefreshToken.jti == jti, RefreshToken.token_hash == hash_token(token))\
+        .values(revoked=True)\
+        .returning(RefreshToken.user_id)
+
+
+def _refresh_token_jti(token: str, verify_exp: bool = True) -> Optional[str]:
     try:
-        payload = jwt.decode(data.refresh_token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        user_id = int(payload.get("sub"))
+        payload = jwt.decode(
+            token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM],
+            options={"verify_exp": verify_exp}
+        )
     except JWTError:
-        raise HTTPException(status_code=401, detail="Invalid token")
+        return None
+    return payload.get("jti")
 
-    db_token = db.query(RefreshToken).filter(RefreshToken.token == data.refresh_token).first()
-    if not db_token or db_token.revoked or db_token.expires_at < datetime.utcnow():
-        raise HTTPException(status_code=401, detail="Refresh token invalid or expired")
 
-    db_token.revoked = True
-    db.commit()
+async def refresh_user_token(data: RefreshTokenRequest, db: AsyncSession) -> Token:
+    jti = _refresh_token_jti(data.refresh_token)
+    if not jti:
+        raise HTTPException(status_code=401, detail="Invalid token")
 
-    access_token = create_access_token(data={"sub": str(user_id)})
+    # Matching only unrevoked rows makes concurrent rotations of the same
+    # token race on the row lock: exactly one of them gets a row back.
+    result = await db.execute(
+        _revoke_refresh_token(data.refresh_token, jti).where(
+            RefreshToken.revoked.isnot(True),
+            RefreshToken.expires_at > datetime.utcnow(),
+        )
+    )
+    row = result.first()
+    if row is None:
+        await db.rollback()
+        raise HTTPException(status_code=401, detail="Refresh token invalid or expired")
+    user_id = row.user_id
+
+    if settings.ACCESS_TOKEN_EMBED_CLAIMS:
+        claims = access_token_claims(await db.get(User, user_id))
+    else:
+        claims = {"sub": str(user_id)}
+    access_token = create_access_token(data=claims)
+    # The new token is inserted in the same transaction as the revocation.
     new_refresh_token = create_refresh_token(db, user_id)
+    await db.commit()
 
     return Token(
         access_token=access_token,
@@ -70,10 +111,13 @@ def refresh_user_token(data: RefreshTokenRequest, db: Session) -> Token:
     )
 
 
-def logout_user(data: RefreshTokenRequest, db: Session):
-    db_token = db.query(RefreshToken).filter(RefreshToken.token == data.refresh_token).first()
-    if not db_token:
+async def logout_user(data: RefreshTokenRequest, db: AsyncSession):
+    jti = _refresh_token_jti(data.refresh_token, verify_exp=False)
+    if not jti:
         raise HTTPException(status_code=404, detail="Token not found")
 
-    db_token.revoked = True
-    db.commit()
+    result = await db.execute(_revoke_refresh_token(data.refresh_token, jti))
+    if result.first() is None:
+        await db.rollback()
+        raise HTTPException(status_code=404, detail="Token not found")
+    await db.commit()
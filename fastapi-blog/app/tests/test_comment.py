@@ -1,5 +1,6 @@
 import unittest
 import uuid
+from datetime import datetime, timedelta
 
 from httpx import AsyncClient, ASGITransport
 from sqlalchemy.orm import Session
@@ -69,6 +70,30 @@ class CommentAPITestCase(unittest.IsolatedAsyncioTestCase):
         self.assertIsInstance(response.json(), list)
         self.assertGreaterEqual(len(response.json()), 1)
 
+    async def test_get_comments_paginates_newest_first(self):
+        now = datetime.utcnow()
+        for i in range(5):
+            self.db.add(Comment(
+                content=f"Comment {i}",
+                post_id=self.test_post.id,
+                author_id=self.test_user.id,
+                created_at=now + timedelta(seconds=i)
+            ))
+        self.db.commit()
+
+        url = f"/api/v1/blog/comments/post/{self.test_post.id}"
+        async with AsyncClient(transport=self.transport, base_url=self.base_url) as ac:
+            first = await ac.get(url, params={"limit": 3})
+            second = await ac.get(url, params={"limit": 3, "cursor": first.headers["X-Next-Cursor"]})
+            oldest = await ac.get(url, params={"limit": 2, "order": "oldest"})
+            missing = await ac.get("/api/v1/blog/comments/post/999999")
+
+        self.assertEqual([c["content"] for c in first.json()], ["Comment 4", "Comment 3", "Comment 2"])
+        self.assertEqual([c["content"] for c in second.json()], ["Comment 1", "Comment 0"])
+        self.assertNotIn("X-Next-Cursor", second.headers)
+        self.assertEqual([c["content"] for c in oldest.json()], ["Comment 0", "Comment 1"])
+        self.assertEqual(missing.status_code, 404)
+
     async def test_update_comment(self):
         # Create comment
         comment = Comment(
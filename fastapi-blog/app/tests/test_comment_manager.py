@@ -0,0 +1,163 @@
+import asyncio
+import json
+import unittest
+
+from app.websockets.comment_manager import CommentConnectionManager
+
+
+class FakeWebSocket:
+    def __init__(self, blocked: bool = False):
+        self.accepted = False
+        self.closed_with = None
+        self.sent = []
+        self.unblocked = asyncio.Event()
+        if not blocked:
+            self.unblocked.set()
+
+    async def accept(self):
+        self.accepted = True
+
+    async def send_text(self, data):
+        await self.unblocked.wait()
+        self.sent.append(json.loads(data))
+
+    async def close(self, code=1000):
+        self.closed_with = code
+
+
+class CommentConnectionManagerTestCase(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.manager = CommentConnectionManager(queue_size=2)
+
+    async def test_broadcast_reaches_only_sockets_of_the_post(self):
+        first, second, other = FakeWebSocket(), FakeWebSocket(), FakeWebSocket()
+        await self.manager.connect(first, 1)
+        await self.manager.connect(second, 1)
+        await self.manager.connect(other, 2)
+
+        await self.manager.broadcast(1, {"type": "new_comment", "data": {"id": 7}})
+        await asyncio.sleep(0.01)
+
+        self.assertEqual(first.sent, [{"type": "new_comment", "data": {"id": 7}, "seq": 1}])
+        self.assertEqual(second.sent, [{"type": "new_comment", "data": {"id": 7}, "seq": 1}])
+        self.assertEqual(other.sent, [])
+
+    async def test_last_disconnect_unsubscribes_from_the_post(self):
+        connection = await self.manager.connect(FakeWebSocket(), 1)
+        self.assertIn(1, self.manager.broker.channels)
+
+        await self.manager.disconnect(connection)
+
+        self.assertNotIn(1, self.manager.broker.channels)
+        self.assertNotIn(1, self.manager.active_connections)
+
+    async def test_slow_consumer_is_dropped_without_blocking_others(self):
+        slow, fast = FakeWebSocket(blocked=True), FakeWebSocket()
+        await self.manager.connect(slow, 1)
+        await self.manager.connect(fast, 1)
+
+        for i in range(5):
+            await self.manager.broadcast(1, {"type": "new_comment", "data": {"id": i}})
+            await asyncio.sleep(0.01)
+
+        self.assertEqual([m["data"]["id"] for m in fast.sent], [0, 1, 2, 3, 4])
+        self.assertEqual(slow.closed_with, 1013)
+        self.assertEqual(self.manager.connection_counts(), {1: 1})
+        # The drop task was tracked until it finished.
+        self.assertEqual(self.manager._drops, set())
+
+    async def test_heartbeat_pings_live_and_reaps_idle_sockets(self):
+        manager = CommentConnectionManager(queue_size=2, idle_timeout=60)
+        live, idle = FakeWebSocket(), FakeWebSocket()
+        await manager.connect(live, 1)
+        idle_connection = await manager.connect(idle, 1)
+        idle_connection.last_seen -= manager.idle_timeout + 1
+
+        await manager.ping_and_reap()
+        await asyncio.sleep(0.01)
+
+        self.assertEqual(live.sent, [{"type": "ping"}])
+        self.assertEqual(idle.closed_with, 1001)
+        self.assertEqual(manager.connection_counts(), {1: 1})
+        self.assertEqual(manager.connection_count(), 1)
+        await manager.close()
+
+    async def test_silent_sockets_are_kept_without_an_idle_timeout(self):
+        listener = FakeWebSocket()
+        connection = await self.manager.connect(listener, 1)
+        connection.last_seen -= 3600
+
+        await self.manager.ping_and_reap()
+        await asyncio.sleep(0.01)
+
+        self.assertEqual(listener.sent, [{"type": "ping"}])
+        self.assertIsNone(listener.closed_with)
+        self.assertEqual(self.manager.connection_count(), 1)
+
+    async def test_events_are_coalesced_within_the_batch_window(self):
+        manager = CommentConnectionManager(batch_window_ms=50, batch_max_size=3)
+        websocket = FakeWebSocket()
+        await manager.connect(websocket, 1)
+
+        await manager.broadcast(1, {"type": "new_comment", "data": {"id": 1}})
+        await manager.broadcast(1, {"type": "new_comment", "data": {"id": 2}})
+        await asyncio.sleep(0.01)
+        self.assertEqual(websocket.sent, [])
+
+        await asyncio.sleep(0.1)
+        self.assertEqual(websocket.sent, [{"type": "batch", "events": [
+            {"type": "new_comment", "data": {"id": 1}},
+            {"type": "new_comment", "data": {"id": 2}},
+        ], "seq": 1}])
+
+        for i in range(3):
+            await manager.broadcast(1, {"type": "delete_comment", "data": {"id": i}})
+        await asyncio.sleep(0.01)
+        self.assertEqual(len(websocket.sent), 2)
+        self.assertEqual(len(websocket.sent[1]["events"]), 3)
+        await manager.close()
+
+    async def test_reconnect_with_since_replays_missed_frames(self):
+        manager = CommentConnectionManager(queue_size=10)
+        for i in range(3):
+            await manager.broadcast(1, {"type": "new_comment", "data": {"id": i}})
+
+        websocket = FakeWebSocket()
+        await manager.connect(websocket, 1, since=1)
+        await manager.broadcast(1, {"type": "new_comment", "data": {"id": 3}})
+        await asyncio.sleep(0.01)
+
+        self.assertEqual([m["seq"] for m in websocket.sent], [2, 3, 4])
+        self.assertEqual([m["data"]["id"] for m in websocket.sent], [1, 2, 3])
+        await manager.close()
+
+    async def test_since_outside_replay_buffer_asks_client_to_resync(self):
+        manager = CommentConnectionManager(queue_size=10)
+        manager.broker.replay_size = 2
+        for i in range(5):
+            await manager.broadcast(1, {"type": "new_comment", "data": {"id": i}})
+
+        websocket = FakeWebSocket()
+        await manager.connect(websocket, 1, since=1)
+        await asyncio.sleep(0.01)
+
+        self.assertEqual(websocket.sent[0], {"type": "resync"})
+        self.assertEqual([m["seq"] for m in websocket.sent[1:]], [4, 5])
+        await manager.close()
+
+    async def test_replay_state_is_kept_for_a_bounded_number_of_idle_posts(self):
+        manager = CommentConnectionManager(queue_size=10)
+        manager.broker.max_posts = 2
+        await manager.connect(FakeWebSocket(), 1)
+        for post_id in (1, 2, 3, 4):
+            await manager.broadcast(post_id, {"type": "new_comment", "data": {"id": post_id}})
+
+        # Post 1 has a subscriber, so it survives although it was published first.
+        self.assertEqual(set(manager.broker._seqs), {1, 4})
+        self.assertEqual(set(manager.broker._replay), {1, 4})
+        frames, _ = await manager.broker.replay(2, since=0)
+        self.assertEqual(frames, [])
+        await manager.close()
+
+    async def asyncTearDown(self):
+        await self.manager.close()
@@ -0,0 +1,39 @@
+import unittest
+
+from httpx import AsyncClient, ASGITransport
+from sqlalchemy import create_engine, exc
+
+from app.main import app
+from app.core.config import settings
+from app.db.pool import InstrumentedQueuePool, pool_stats
+
+
+class DatabasePoolTestCase(unittest.IsolatedAsyncioTestCase):
+    async def test_pool_records_checkouts_and_timeouts(self):
+        engine = create_engine(
+            settings.SQLALCHEMY_DATABASE_URI,
+            poolclass=InstrumentedQueuePool,
+            pool_size=1,
+            max_overflow=0,
+            pool_timeout=0.05,
+        )
+        held = engine.connect()
+        with self.assertRaises(exc.TimeoutError):
+            engine.connect()
+
+        stats = pool_stats(engine.pool)
+        held.close()
+        engine.dispose()
+
+        self.assertEqual(stats["checked_out"], 1)
+        self.assertEqual(stats["checkouts"], 2)
+        self.assertEqual(stats["timeouts"], 1)
+        self.assertGreaterEqual(stats["checkout_wait_seconds_max"], 0.05)
+
+    async def test_pool_stats_are_exported_as_metrics(self):
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+            response = await ac.get("/api/v1/monitoring/metrics")
+
+        self.assertEqual(response.status_code, 200)
+        for name in ("db_pool_sync", "db_pool_async"):
+            self.assertEqual(response.json()[name]["size"], settings.DB_POOL_SIZE)
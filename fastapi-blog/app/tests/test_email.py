@@ -0,0 +1,42 @@
+import unittest
+from unittest.mock import AsyncMock, patch
+
+from httpx import AsyncClient, ASGITransport
+
+from app.main import app
+from app.core.config import settings
+from app.core.rate_limit import InMemoryRateLimiter
+
+PAYLOAD = {"to_email": "someone@example.com", "subject": "Hi", "content": "Hello"}
+
+
+@patch("app.api.v1.notifications.email.send_email_async")
+class EmailNotificationTestCase(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.transport = ASGITransport(app=app)
+        self.base_url = "http://test"
+        limiter = patch("app.services.notifications.email_service.email_rate_limiter", InMemoryRateLimiter(rate=1 / 60, burst=2))
+        limiter.start()
+        self.addCleanup(limiter.stop)
+
+    @patch("app.services.notifications.email_service.get_email_queue_depth", new_callable=AsyncMock, return_value=0)
+    async def test_requests_over_the_burst_are_rate_limited(self, mock_depth, mock_send):
+        async with AsyncClient(transport=self.transport, base_url=self.base_url) as ac:
+            responses = [await ac.post("/api/v1/notifications/email", json=PAYLOAD) for _ in range(3)]
+
+        self.assertEqual([r.status_code for r in responses], [202, 202, 429])
+        self.assertGreaterEqual(int(responses[2].headers["Retry-After"]), 1)
+        self.assertEqual(mock_send.call_count, 2)
+
+    @patch("app.services.notifications.email_service.get_email_queue_depth", new_callable=AsyncMock)
+    async def test_backed_up_queue_is_rejected(self, mock_depth, mock_send):
+        mock_depth.return_value = settings.EMAIL_QUEUE_MAX_DEPTH
+        async with AsyncClient(transport=self.transport, base_url=self.base_url) as ac:
+            rejected = [await ac.post("/api/v1/notifications/email", json=PAYLOAD) for _ in range(3)]
+            mock_depth.return_value = 0
+            # The 503s did not use up the burst.
+            accepted = [await ac.post("/api/v1/notifications/email", json=PAYLOAD) for _ in range(2)]
+
+        self.assertEqual([r.status_code for r in rejected], [503, 503, 503])
+        self.assertEqual([r.status_code for r in accepted], [202, 202])
+        self.assertEqual(mock_send.call_count, 2)
@@ -0,0 +1,90 @@
+import smtplib
+import unittest
+from unittest.mock import patch
+
+from app.core.config import settings
+from app.workers import mailer
+from app.workers.mailer import SMTPConnectionPool, build_message
+from app.workers.tasks import send_bulk_email
+
+
+class FakeSMTP:
+    instances = []
+
+    def __init__(self, host, port, timeout=None):
+        self.logins = 0
+        self.sent = []
+        self.disconnect_next = False
+        FakeSMTP.instances.append(self)
+
+    def starttls(self):
+        pass
+
+    def login(self, username, password):
+        self.logins += 1
+
+    def send_message(self, message):
+        if self.disconnect_next:
+            raise smtplib.SMTPServerDisconnected("Connection unexpectedly closed")
+        if message["To"].startswith("bounce"):
+            raise smtplib.SMTPRecipientsRefused({message["To"]: (550, b"No such user")})
+        self.sent.append(message["To"])
+
+    def quit(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class MailerTestCase(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        FakeSMTP.instances = []
+        mailer.close_mailer()
+
+    def tearDown(self):
+        mailer.close_mailer()
+
+    @patch("app.workers.mailer.smtplib.SMTP", FakeSMTP)
+    async def test_pool_reuses_sessions_up_to_max_messages(self):
+        pool = SMTPConnectionPool("smtp.test", 587, "user", "secret", size=1, max_messages=2)
+
+        failed = pool.send_many(build_message(f"user{i}@example.com", "Hi", "Hello") for i in range(5))
+        pool.send(build_message("late@example.com", "Hi", "Hello"))
+
+        self.assertEqual(failed, [])
+        self.assertEqual([len(smtp.sent) for smtp in FakeSMTP.instances], [2, 2, 2])
+        self.assertEqual([smtp.logins for smtp in FakeSMTP.instances], [1, 1, 1])
+
+    @patch("app.workers.mailer.smtplib.SMTP", FakeSMTP)
+    async def test_pool_reconnects_after_disconnect(self):
+        pool = SMTPConnectionPool("smtp.test", 587, "user", "secret", size=1)
+        pool.send(build_message("first@example.com", "Hi", "Hello"))
+        FakeSMTP.instances[0].disconnect_next = True
+
+        pool.send(build_message("second@example.com", "Hi", "Hello"))
+
+        self.assertEqual(len(FakeSMTP.instances), 2)
+        self.assertEqual(FakeSMTP.instances[1].sent, ["second@example.com"])
+
+    @patch("app.workers.mailer.smtplib.SMTP", FakeSMTP)
+    async def test_refused_recipient_fails_only_that_message(self):
+        pool = SMTPConnectionPool("smtp.test", 587, "user", "secret", size=1)
+        recipients = ["a@example.com", "bounce1@example.com", "b@example.com", "bounce2@example.com", "c@example.com"]
+
+        failed = pool.send_many(build_message(to, "Hi", "Hello") for to in recipients)
+
+        self.assertEqual([message["To"] for message in failed], ["bounce1@example.com", "bounce2@example.com"])
+        self.assertEqual(len(FakeSMTP.instances), 1)
+        self.assertEqual(FakeSMTP.instances[0].sent, ["a@example.com", "b@example.com", "c@example.com"])
+
+    async def test_send_bulk_email_with_locmem_backend(self):
+        with patch.object(settings, "EMAIL_BACKEND", "locmem"):
+            sent = send_bulk_email([
+                {"to_email": f"user{i}@example.com", "subject": "News", "content": "Hello"}
+                for i in range(3)
+            ])
+            outbox = mailer.get_mailer().outbox
+
+        self.assertEqual(sent, 3)
+        self.assertEqual([message["To"] for message in outbox], [f"user{i}@example.com" for i in range(3)])
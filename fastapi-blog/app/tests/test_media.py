@@ -1,16 +1,26 @@
+import os
+import tempfile
 import unittest
 import uuid
+from datetime import datetime, timedelta
 from unittest.mock import patch
 from io import BytesIO
 
+import cloudinary
+import cloudinary.utils
 from httpx import AsyncClient, ASGITransport
 from sqlalchemy.orm import Session
 
 from app.main import app
+from app.middleware.upload_limit import UploadSizeLimitMiddleware
 from app.db.session import SessionLocal
 from app.models.user import User
 from app.models.post import Post
 from app.models.media import Media
+from app.models.media_deletion import MediaDeletion
+from app.models.direct_upload import DirectUpload
+from app.workers.tasks import delete_media_files, expire_direct_uploads
+from app.core.config import settings
 from app.core.dependencies import get_current_user
 
 
@@ -65,6 +75,121 @@ class MediaAPITestCase(unittest.IsolatedAsyncioTestCase):
         self.assertEqual(data["url"], "http://cloudinary.com/fake.jpg")
         self.assertEqual(data["media_type"], "image")
 
+    async def test_upload_media_to_local_storage(self):
+        with tempfile.TemporaryDirectory() as root, \
+                patch.object(settings, "MEDIA_STORAGE_BACKEND", "local"), \
+                patch.object(settings, "MEDIA_LOCAL_ROOT", root), \
+                patch.object(settings, "MEDIA_UPLOAD_CHUNK_SIZE", 4):
+            files = {"file": ("test.jpg", BytesIO(b"fake image data"), "image/jpeg")}
+            async with AsyncClient(transport=self.transport, base_url=self.base_url) as ac:
+                response = await ac.post(f"/api/v1/blog/media/upload/{self.test_post.id}", files=files)
+
+            self.assertEqual(response.status_code, 201)
+            self.assertEqual(response.json()["media_type"], "image")
+            media = self.db.query(Media).filter(Media.post_id == self.test_post.id).one()
+            with open(os.path.join(root, media.public_id), "rb") as stored:
+                self.assertEqual(stored.read(), b"fake image data")
+
+    @patch("app.services.blog.media_service.upload_media_to_cloudinary")
+    async def test_upload_media_over_size_cap_is_rejected(self, mock_upload):
+        with patch.object(settings, "MEDIA_MAX_UPLOAD_BYTES", 8):
+            files = {"file": ("test.jpg", BytesIO(b"fake image data"), "image/jpeg")}
+            async with AsyncClient(transport=self.transport, base_url=self.base_url) as ac:
+                response = await ac.post(f"/api/v1/blog/media/upload/{self.test_post.id}", files=files)
+
+        self.assertEqual(response.status_code, 413)
+        mock_upload.assert_not_called()
+
+    @patch("app.middleware.upload_limit.MULTIPART_OVERHEAD_BYTES", 0)
+    @patch("app.services.blog.media_service.upload_media_to_cloudinary")
+    async def test_oversized_upload_body_is_rejected_before_parsing(self, mock_upload):
+        transport = ASGITransport(app=UploadSizeLimitMiddleware(app, max_bytes=64))
+        url = f"/api/v1/blog/media/upload/{self.test_post.id}"
+        boundary = "limit-test"
+        body = (
+            f"--{boundary}\r\nContent-Disposition: form-data; name=\"file\"; filename=\"big.jpg\"\r\n"
+            f"Content-Type: image/jpeg\r\n\r\n"
+        ).encode() + b"x" * 1024 + f"\r\n--{boundary}--\r\n".encode()
+
+        async def chunked():
+            for start in range(0, len(body), 100):
+                yield body[start:start + 100]
+
+        async with AsyncClient(transport=transport, base_url=self.base_url) as ac:
+            declared = await ac.post(url, content=body, headers={"Content-Type": f"multipart/form-data; boundary={boundary}"})
+            streamed = await ac.post(url, content=chunked(), headers={"Content-Type": f"multipart/form-data; boundary={boundary}"})
+
+        self.assertEqual(declared.status_code, 413)
+        self.assertEqual(streamed.status_code, 413)
+        mock_upload.assert_not_called()
+
+    @staticmethod
+    def _cloudinary_upload_response(public_id):
+        # What Cloudinary returns for an upload, signed with the API secret.
+        return {
+            "public_id": public_id,
+            "version": 1700000000,
+            "signature": cloudinary.utils.api_sign_request(
+                {"public_id": public_id, "version": 1700000000},
+                cloudinary.config().api_secret,
+                signature_version=1,
+            ),
+        }
+
+    @patch("app.services.blog.media_service.fetch_uploaded_resource")
+    async def test_direct_upload_is_signed_and_confirmed(self, mock_fetch):
+        mock_fetch.return_value = {"bytes": 1024, "version": 1700000000}
+        async with AsyncClient(transport=self.transport, base_url=self.base_url) as ac:
+            signed = (await ac.post(f"/api/v1/blog/media/upload/{self.test_post.id}/sign")).json()
+            public_id = signed["public_id"]
+            uploaded = self._cloudinary_upload_response(public_id)
+            forged = await ac.post(
+                f"/api/v1/blog/media/upload/{self.test_post.id}/confirm",
+                json={**uploaded, "signature": "forged"},
+            )
+            confirmed = await ac.post(f"/api/v1/blog/media/upload/{self.test_post.id}/confirm", json=uploaded)
+
+        self.assertTrue(public_id.startswith(f"media/{self.test_post.id}/"))
+        self.assertTrue(signed["upload_url"].endswith("/image/upload"))
+        self.assertEqual(forged.status_code, 400)
+        self.assertEqual(confirmed.status_code, 201)
+        self.assertTrue(confirmed.json()["url"].endswith(f"/image/upload/v1700000000/{public_id}"))
+        # One Admin API lookup, for the type that was signed.
+        mock_fetch.assert_called_once_with(public_id, "image")
+        self.assertIsNone(self.db.query(DirectUpload).filter(DirectUpload.public_id == public_id).first())
+
+    @patch("app.services.blog.media_service.fetch_uploaded_resource")
+    async def test_direct_upload_over_size_cap_is_rejected(self, mock_fetch):
+        mock_fetch.return_value = {"bytes": 1024, "version": 1700000000}
+        with patch.object(settings, "MEDIA_MAX_UPLOAD_BYTES", 8):
+            async with AsyncClient(transport=self.transport, base_url=self.base_url) as ac:
+                signed = (await ac.post(
+                    f"/api/v1/blog/media/upload/{self.test_post.id}/sign", params={"resource_type": "video"}
+                )).json()
+                public_id = signed["public_id"]
+                response = await ac.post(
+                    f"/api/v1/blog/media/upload/{self.test_post.id}/confirm",
+                    json=self._cloudinary_upload_response(public_id),
+                )
+
+        self.assertEqual(response.status_code, 413)
+        self.assertIsNone(self.db.query(Media).filter(Media.public_id == public_id).first())
+        deletion = self.db.query(MediaDeletion).filter(MediaDeletion.public_id == public_id).one()
+        self.assertEqual(deletion.resource_type, "video")
+
+    async def test_unconfirmed_direct_uploads_are_queued_for_deletion(self):
+        async with AsyncClient(transport=self.transport, base_url=self.base_url) as ac:
+            stale = (await ac.post(f"/api/v1/blog/media/upload/{self.test_post.id}/sign")).json()["public_id"]
+            fresh = (await ac.post(f"/api/v1/blog/media/upload/{self.test_post.id}/sign")).json()["public_id"]
+        self.db.query(DirectUpload).filter(DirectUpload.public_id == stale)\
+            .update({"expires_at": datetime.utcnow() - timedelta(minutes=1)})
+        self.db.commit()
+
+        self.assertEqual(expire_direct_uploads(), 1)
+
+        self.assertEqual([row.public_id for row in self.db.query(DirectUpload).all()], [fresh])
+        self.assertEqual([row.public_id for row in self.db.query(MediaDeletion).all()], [stale])
+
     async def test_get_media(self):
         # Tạo media trực tiếp
         media = Media(
@@ -83,8 +208,30 @@ class MediaAPITestCase(unittest.IsolatedAsyncioTestCase):
         self.assertEqual(response.status_code, 200)
         self.assertEqual(response.json()["url"], "http://cloudinary.com/test.jpg")
 
-    @patch("app.services.blog.media_service.delete_media_from_cloudinary")
-    async def test_delete_media(self, mock_delete_cloudinary):
+    async def test_get_media_variants(self):
+        media = Media(
+            url="http://cloudinary.com/test.jpg",
+            public_id="media/test_public_id",
+            media_type="image",
+            post_id=self.test_post.id
+        )
+        self.db.add(media)
+        self.db.commit()
+        self.db.refresh(media)
+
+        async with AsyncClient(transport=self.transport, base_url=self.base_url) as ac:
+            original = await ac.get(f"/api/v1/blog/media/{media.id}")
+            thumbnail = await ac.get(f"/api/v1/blog/media/{media.id}", params={"variant": "thumbnail"})
+            unknown = await ac.get(f"/api/v1/blog/media/{media.id}", params={"variant": "huge"})
+
+        variants = original.json()["variants"]
+        self.assertEqual(set(variants), {"thumbnail", "medium", "webp", "avif"})
+        self.assertIn("/image/upload/c_fill,f_auto,g_auto,h_150,q_auto,w_150/", variants["thumbnail"])
+        self.assertTrue(variants["avif"].endswith("/media/test_public_id.avif"))
+        self.assertEqual(thumbnail.json()["url"], variants["thumbnail"])
+        self.assertEqual(unknown.status_code, 422)
+
+    async def test_delete_media(self):
         media = Media(
             url="http://cloudinary.com/test.jpg",
             public_id="test_public_id",
@@ -100,10 +247,47 @@ class MediaAPITestCase(unittest.IsolatedAsyncioTestCase):
 
         self.assertEqual(response.status_code, 200)
         self.assertEqual(response.json()["message"], "Media deleted successfully")
-        mock_delete_cloudinary.assert_called_once_with("test_public_id", "image")
+        # The file is queued for the worker rather than deleted in the request.
+        queued = self.db.query(MediaDeletion).one()
+        self.assertEqual((queued.public_id, queued.resource_type), ("test_public_id", "image"))
+
+    @patch("app.workers.tasks.delete_media_batch_from_cloudinary")
+    async def test_delete_media_files_drains_outbox_in_batches(self, mock_delete_batch):
+        mock_delete_batch.side_effect = lambda public_ids, media_type: public_ids
+        self.db.add_all([
+            MediaDeletion(public_id="a", resource_type="image"),
+            MediaDeletion(public_id="b", resource_type="image"),
+            MediaDeletion(public_id="c", resource_type="video"),
+        ])
+        self.db.commit()
+
+        self.assertEqual(delete_media_files(batch_size=2), 3)
+
+        self.assertEqual(self.db.query(MediaDeletion).count(), 0)
+        self.assertEqual(
+            [c.args for c in mock_delete_batch.call_args_list],
+            [(["a", "b"], "image"), (["c"], "video")],
+        )
+
+    @patch("app.workers.tasks.delete_media_batch_from_cloudinary", return_value=[])
+    async def test_delete_media_files_gives_up_after_max_attempts(self, mock_delete_batch):
+        row = MediaDeletion(public_id="stuck", resource_type="image", attempts=settings.MEDIA_DELETION_MAX_ATTEMPTS - 1)
+        self.db.add(row)
+        self.db.commit()
+
+        # The last attempt fails without scheduling a retry...
+        self.assertEqual(delete_media_files(), 0)
+        # ...and the dead letter is not tried again.
+        self.assertEqual(delete_media_files(), 0)
+
+        self.db.refresh(row)
+        self.assertEqual(row.attempts, settings.MEDIA_DELETION_MAX_ATTEMPTS)
+        mock_delete_batch.assert_called_once_with(["stuck"], "image")
 
     async def asyncTearDown(self):
         self.db.query(Media).delete()
+        self.db.query(MediaDeletion).delete()
+        self.db.query(DirectUpload).delete()
         self.db.query(Post).delete()
         self.db.query(User).delete()
         self.db.commit()
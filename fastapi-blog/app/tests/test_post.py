@@ -7,14 +7,19 @@ from sqlalchemy.orm import Session
 from httpx import AsyncClient, ASGITransport
 
 from app.main import app
-from app.db.session import SessionLocal
+from app.db.session import SessionLocal, engine
 from app.models.post import Post
 from app.models.token import RefreshToken
 from app.models.user import User
 from app.models.comment import Comment
 from app.models.media import Media
 from app.models.category import Category
+from app.models.outbox import OutboxMessage
 from app.core.dependencies import get_current_user
+from app.middleware.view_counter import ViewCountBuffer, view_counter
+from app.core.cache import post_cache
+from app.core.config import settings
+from app.workers.tasks import fan_out_post_notification, relay_outbox
 
 
 class PostTestCase(unittest.IsolatedAsyncioTestCase):
@@ -46,11 +51,10 @@ class PostTestCase(unittest.IsolatedAsyncioTestCase):
 
         # Override auth
         app.dependency_overrides[get_current_user] = lambda: self.test_user
+        await post_cache.clear()
+        await view_counter.flush()
 
-    @patch("app.services.blog.post_service.send_notification_email.delay")
-    async def test_create_post(self, mock_send_email):
-        mock_send_email.return_value = None
-
+    async def test_create_post(self):
         async with AsyncClient(transport=self.transport, base_url=self.base_url) as ac:
             response = await ac.post(
                 "/api/v1/blog/post/",
@@ -66,7 +70,26 @@ class PostTestCase(unittest.IsolatedAsyncioTestCase):
         self.assertEqual(response.json()["title"], "Test Post")
         self.assertEqual(response.json()["content"], "Post content")
         self.assertEqual(response.json()["category"]["id"], self.test_category.id)
-        mock_send_email.assert_called_once()
+        # The notification is queued in the outbox, not sent to the broker.
+        message = self.db.query(OutboxMessage).one()
+        self.assertEqual(message.task, fan_out_post_notification.name)
+        self.assertEqual(message.args, [response.json()["id"]])
+
+    @patch("app.workers.tasks.celery.send_task")
+    async def test_outbox_relay_publishes_and_clears_rows(self, mock_send_task):
+        self.db.add_all([
+            OutboxMessage(task=fan_out_post_notification.name, args=[1]),
+            OutboxMessage(task=fan_out_post_notification.name, args=[2]),
+        ])
+        self.db.commit()
+
+        self.assertEqual(relay_outbox(batch_size=1), 2)
+
+        self.assertEqual(self.db.query(OutboxMessage).count(), 0)
+        self.assertEqual(
+            [c.kwargs["args"] for c in mock_send_task.call_args_list],
+            [[1], [2]],
+        )
 
     async def test_get_post_list(self):
         post = Post(
@@ -102,6 +125,43 @@ class PostTestCase(unittest.IsolatedAsyncioTestCase):
         self.assertEqual(len(data), 2)
         self.assertTrue(all("fastapi" in (p["title"] + p["content"]).lower() for p in data))
 
+    async def test_search_cannot_be_combined_with_a_cursor(self):
+        async with AsyncClient(transport=self.transport, base_url=self.base_url) as ac:
+            response = await ac.get("/api/v1/blog/", params={"search": "fastapi", "cursor": "abc"})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.json()["detail"], "Cursor pagination is not supported with search")
+
+    @unittest.skipUnless(engine.dialect.name == "postgresql", "full-text search runs on Postgres only")
+    async def test_postgres_search_is_ranked_and_accepts_websearch_syntax(self):
+        def add_post(title, content):
+            post = Post(title=title, content=content, author_id=self.test_user.id, category_id=self.test_category.id)
+            self.db.add(post)
+            return post
+
+        best = add_post("Async FastAPI tutorial", "FastAPI async. More FastAPI async.")
+        weaker = add_post("Sync tutorial", "Mentions FastAPI once, and async once.")
+        flask = add_post("Flask comparison", "FastAPI vs Flask")
+        add_post("Flask only", "Async views in Flask")
+        self.db.commit()
+
+        async def search(query):
+            async with AsyncClient(transport=self.transport, base_url=self.base_url) as ac:
+                response = await ac.get("/api/v1/blog/", params={"search": query})
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            return [p["id"] for p in response.json()]
+
+        with patch.object(settings, "POST_SEARCH_TRIGRAM_FALLBACK", False):
+            # Every term must match; more occurrences rank higher.
+            self.assertEqual(await search("fastapi async"), [best.id, weaker.id])
+            self.assertEqual(await search('"fastapi tutorial"'), [best.id])
+            self.assertEqual(set(await search("fastapi -flask")), {best.id, weaker.id})
+            self.assertEqual(await search("fastap"), [])
+
+        with patch.object(settings, "POST_SEARCH_TRIGRAM_FALLBACK", True):
+            # Partial words only match through the substring fallback.
+            self.assertEqual(set(await search("fastap")), {best.id, weaker.id, flask.id})
+
     async def test_filter_post_by_category_id(self):
         # Create second category
         category2 = Category(name="Django")
@@ -165,6 +225,31 @@ class PostTestCase(unittest.IsolatedAsyncioTestCase):
         self.assertEqual(data["title"], "New Title")
         self.assertEqual(data["content"], "Updated content")
 
+    async def test_post_detail_cache_invalidated_on_update(self):
+        post = Post(
+            title="Cached",
+            content="Cached content",
+            author_id=self.test_user.id,
+            category_id=self.test_category.id,
+        )
+        self.db.add(post)
+        self.db.commit()
+        self.db.refresh(post)
+
+        async with AsyncClient(transport=self.transport, base_url=self.base_url) as ac:
+            response = await ac.get(f"/api/v1/blog/post/{post.id}")
+            self.assertEqual(response.json()["title"], "Cached")
+            self.assertIsNotNone(await post_cache.get(post.id))
+
+            await ac.put(
+                f"/api/v1/blog/post/{post.id}",
+                json={"title": "Fresh", "content": "Cached content", "category_id": self.test_category.id},
+            )
+            response = await ac.get(f"/api/v1/blog/post/{post.id}")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()["title"], "Fresh")
+
     async def test_delete_post(self):
         post = Post(
             title="Delete Me",
@@ -207,9 +292,107 @@ class PostTestCase(unittest.IsolatedAsyncioTestCase):
         self.assertIsInstance(data, list)
         self.assertEqual(len(data), 10)
 
+    async def test_post_cursor_pagination(self):
+        posts = [
+            Post(
+                title=f"Post {i}",
+                content="Content",
+                author_id=self.test_user.id,
+                category_id=self.test_category.id,
+            )
+            for i in range(15)
+        ]
+        self.db.add_all(posts)
+        self.db.commit()
+
+        async with AsyncClient(transport=self.transport, base_url=self.base_url) as ac:
+            first = await ac.get("/api/v1/blog/", params={"limit": 10, "category_id": self.test_category.id})
+            cursor = first.headers.get("X-Next-Cursor")
+            self.assertIsNotNone(cursor)
+
+            second = await ac.get("/api/v1/blog/", params={"limit": 10, "category_id": self.test_category.id, "cursor": cursor})
+            invalid = await ac.get("/api/v1/blog/", params={"cursor": "not-a-cursor"})
+
+        self.assertEqual(second.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(second.json()), 5)
+        self.assertNotIn("X-Next-Cursor", second.headers)
+        first_ids = {p["id"] for p in first.json()}
+        self.assertTrue(first_ids.isdisjoint(p["id"] for p in second.json()))
+        self.assertEqual(invalid.status_code, status.HTTP_400_BAD_REQUEST)
+
+    async def test_post_summary_list(self):
+        post = Post(
+            title="Summary",
+            content="Content",
+            author_id=self.test_user.id,
+            category_id=self.test_category.id,
+        )
+        self.db.add(post)
+        self.db.commit()
+        self.db.refresh(post)
+        self.db.add_all([
+            Comment(content="First", post_id=post.id, author_id=self.test_user.id),
+            Comment(content="Second", post_id=post.id, author_id=self.test_user.id),
+            Media(url="http://cloudinary.com/a.jpg", public_id="media/a", media_type="image", post_id=post.id),
+        ])
+        self.db.commit()
+
+        async with AsyncClient(transport=self.transport, base_url=self.base_url) as ac:
+            response = await ac.get("/api/v1/blog/summary")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        summary = next(p for p in response.json() if p["id"] == post.id)
+        self.assertEqual(summary["comment_count"], 2)
+        self.assertEqual(summary["media_count"], 1)
+        # The thumbnail transformation, not the full-size original.
+        self.assertIn("/image/upload/c_fill,f_auto,g_auto,h_150,q_auto,w_150/", summary["thumbnail_url"])
+        self.assertTrue(summary["thumbnail_url"].endswith("/media/a"))
+        self.assertEqual(summary["category_name"], self.test_category.name)
+        self.assertNotIn("comments", summary)
+
+    async def test_post_views_are_buffered(self):
+        post = Post(
+            title="Viewed",
+            content="Content",
+            views=0,
+            author_id=self.test_user.id,
+            category_id=self.test_category.id,
+        )
+        self.db.add(post)
+        self.db.commit()
+        self.db.refresh(post)
+
+        async with AsyncClient(transport=self.transport, base_url=self.base_url) as ac:
+            for _ in range(3):
+                response = await ac.get(f"/api/v1/blog/post/{post.id}")
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        self.db.refresh(post)
+        self.assertEqual(post.views, 0)
+
+        await view_counter.flush()
+        self.db.refresh(post)
+        self.assertEqual(post.views, 3)
+        # The payload cached by the first view is invalidated by the flush.
+        async with AsyncClient(transport=self.transport, base_url=self.base_url) as ac:
+            response = await ac.get(f"/api/v1/blog/post/{post.id}")
+        self.assertEqual(response.json()["views"], 3)
+
+    async def test_failed_view_flush_keeps_deltas_without_waking(self):
+        buffer = ViewCountBuffer(flush_interval=60, flush_threshold=2)
+        buffer.add(1)
+        buffer.add(1)
+        buffer._wakeup.clear()
+
+        with patch.object(buffer, "_write", side_effect=ConnectionError("db down")):
+            self.assertFalse(await buffer.flush())
+
+        self.assertEqual(buffer._pending, {1: 2})
+        self.assertFalse(buffer._wakeup.is_set())
 
 
     async def asyncTearDown(self):
+        self.db.query(OutboxMessage).delete()
         self.db.query(RefreshToken).delete()
         self.db.query(Comment).delete()
         self.db.query(Media).delete()
@@ -0,0 +1,114 @@
+import unittest
+import uuid
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+from httpx import AsyncClient, ASGITransport
+from sqlalchemy.orm import Session
+
+from app.main import app
+from app.db.session import SessionLocal
+from app.models.user import User
+from app.models.post import Post
+from app.models.subscription import NotificationDelivery, Subscription
+from app.core.config import settings
+from app.core.dependencies import get_current_user
+from app.workers import mailer
+from app.workers.tasks import celery, fan_out_post_notification, notify_subscribers, purge_notification_deliveries
+
+
+class SubscriptionTestCase(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.db: Session = SessionLocal()
+        self.transport = ASGITransport(app=app)
+        self.base_url = "http://test"
+
+        def make_user() -> User:
+            username = f"user_{uuid.uuid4().hex[:6]}"
+            return User(username=username, email=f"{username}@example.com", hashed_password="fakehashed")
+
+        self.author = make_user()
+        self.subscribers = [make_user() for _ in range(3)]
+        self.db.add_all([self.author, *self.subscribers])
+        self.db.commit()
+        mailer.close_mailer()
+
+    async def test_subscribe_and_unsubscribe(self):
+        subscriber = self.subscribers[0]
+        app.dependency_overrides[get_current_user] = lambda: subscriber
+        url = f"/api/v1/users/{self.author.id}/subscription"
+
+        async with AsyncClient(transport=self.transport, base_url=self.base_url) as ac:
+            first = await ac.post(url)
+            again = await ac.post(url)
+            self_subscribe = await ac.post(f"/api/v1/users/{subscriber.id}/subscription")
+            removed = await ac.delete(url)
+            missing = await ac.delete(url)
+
+        self.assertEqual(first.status_code, 201)
+        self.assertEqual(first.json()["subscriber_id"], subscriber.id)
+        self.assertEqual(again.status_code, 201)
+        self.assertEqual(self_subscribe.status_code, 400)
+        self.assertEqual(removed.status_code, 200)
+        self.assertEqual(missing.status_code, 404)
+        self.assertEqual(self.db.query(Subscription).filter_by(author_id=self.author.id).count(), 0)
+
+    async def test_fan_out_notifies_each_subscriber_once(self):
+        post = Post(title="Hello", content="World", author_id=self.author.id)
+        self.db.add(post)
+        self.db.add_all([Subscription(author_id=self.author.id, subscriber_id=s.id) for s in self.subscribers])
+        self.db.commit()
+
+        # Run the chunk tasks inline instead of publishing them.
+        celery.conf.task_always_eager = True
+        self.addCleanup(setattr, celery.conf, "task_always_eager", False)
+        with patch.object(settings, "EMAIL_BACKEND", "locmem"):
+            chunks = fan_out_post_notification(post.id, chunk_size=2, group_size=1)
+            # A redelivered fan-out must not email anyone twice.
+            fan_out_post_notification(post.id, chunk_size=2, group_size=1)
+            outbox = mailer.get_mailer().outbox
+
+        self.assertEqual(chunks, 2)
+        self.assertEqual(sorted(m["To"] for m in outbox), sorted(s.email for s in self.subscribers))
+        self.assertEqual(outbox[0]["Subject"], f"New post by {self.author.username}")
+
+    async def test_chunk_skips_subscribers_claimed_by_another_run(self):
+        post = Post(title="Hello", content="World", author_id=self.author.id)
+        self.db.add(post)
+        self.db.commit()
+        # A concurrent run of the same chunk already claimed the first subscriber.
+        self.db.add(NotificationDelivery(notification_key=f"post:{post.id}", user_id=self.subscribers[0].id))
+        self.db.commit()
+
+        with patch.object(settings, "EMAIL_BACKEND", "locmem"):
+            sent = notify_subscribers(post.id, [s.id for s in self.subscribers])
+            again = notify_subscribers(post.id, [s.id for s in self.subscribers])
+            outbox = mailer.get_mailer().outbox
+
+        self.assertEqual((sent, again), (2, 0))
+        self.assertEqual(sorted(m["To"] for m in outbox), sorted(s.email for s in self.subscribers[1:]))
+
+    async def test_purge_removes_deliveries_past_retention(self):
+        now = datetime.utcnow()
+        old, recent = self.subscribers[0], self.subscribers[1]
+        self.db.add_all([
+            NotificationDelivery(notification_key="post:1", user_id=old.id,
+                                 created_at=now - timedelta(days=settings.NOTIFICATION_DELIVERY_RETENTION_DAYS + 1)),
+            NotificationDelivery(notification_key="post:1", user_id=recent.id, created_at=now),
+        ])
+        self.db.commit()
+
+        self.assertEqual(purge_notification_deliveries(batch_size=1), 1)
+
+        remaining = [d.user_id for d in self.db.query(NotificationDelivery)]
+        self.assertEqual(remaining, [recent.id])
+
+    async def asyncTearDown(self):
+        mailer.close_mailer()
+        app.dependency_overrides.pop(get_current_user, None)
+        self.db.query(NotificationDelivery).delete()
+        self.db.query(Subscription).delete()
+        self.db.query(Post).delete()
+        self.db.query(User).delete()
+        self.db.commit()
+        self.db.close()
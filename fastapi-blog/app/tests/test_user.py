@@ -1,6 +1,15 @@
 import unittest
 from httpx import AsyncClient, ASGITransport
 from app.main import app
+from app.db.session import AsyncSessionLocal
+from app.db.session import SessionLocal
+from app.models.user import User
+from app.models.token import RefreshToken
+from app.workers.tasks import purge_refresh_tokens
+from datetime import datetime, timedelta
+from app.core.config import settings
+from app.core.dependencies import get_current_user, principal_cache
+from passlib.context import CryptContext
 from fastapi import status
 import uuid
 
@@ -47,3 +56,97 @@ class UserTestCase(unittest.IsolatedAsyncioTestCase):
             })
             self.assertEqual(response.status_code, status.HTTP_200_OK)
             self.assertEqual(response.json()["message"], "Logout successful")
+
+    async def test_refresh_token_cannot_be_reused(self):
+        async with AsyncClient(transport=self.transport, base_url=self.base_url) as ac:
+            await ac.post("/api/v1/users/register", json={
+                "username": self.username,
+                "email": self.email,
+                "password": self.password
+            })
+            response = await ac.post("/api/v1/users/login", data={
+                "username": self.username,
+                "password": self.password
+            })
+            refresh_token = response.json()["refresh_token"]
+
+            first = await ac.post("/api/v1/users/refresh", json={"refresh_token": refresh_token})
+            second = await ac.post("/api/v1/users/refresh", json={"refresh_token": refresh_token})
+
+        self.assertEqual(first.status_code, status.HTTP_200_OK)
+        self.assertEqual(second.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    async def test_current_user_is_cached(self):
+        async with AsyncClient(transport=self.transport, base_url=self.base_url) as ac:
+            await ac.post("/api/v1/users/register", json={
+                "username": self.username,
+                "email": self.email,
+                "password": self.password
+            })
+            response = await ac.post("/api/v1/users/login", data={
+                "username": self.username,
+                "password": self.password
+            })
+        access_token = response.json()["access_token"]
+
+        async with AsyncSessionLocal() as db:
+            user = await get_current_user(access_token, db)
+
+        self.assertEqual(user.username, self.username)
+        self.assertEqual(user.email, self.email)
+        self.assertEqual(await principal_cache.get(user.id), {
+            "id": user.id,
+            "username": self.username,
+            "email": self.email,
+        })
+
+    async def test_login_rehashes_outdated_password(self):
+        legacy_context = CryptContext(schemes=["bcrypt"], bcrypt__rounds=4)
+        db = SessionLocal()
+        user = User(
+            username=self.username,
+            email=self.email,
+            hashed_password=legacy_context.hash(self.password)
+        )
+        db.add(user)
+        db.commit()
+
+        async with AsyncClient(transport=self.transport, base_url=self.base_url) as ac:
+            response = await ac.post("/api/v1/users/login", data={
+                "username": self.username,
+                "password": self.password
+            })
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        db.refresh(user)
+        self.assertTrue(user.hashed_password.startswith(f"$2b${settings.BCRYPT_ROUNDS:02d}$"))
+        db.close()
+
+    async def test_purge_refresh_tokens(self):
+        db = SessionLocal()
+        user = User(username=self.username, email=self.email, hashed_password="hashed")
+        db.add(user)
+        db.commit()
+
+        def make_token(revoked: bool, expires_in: timedelta) -> RefreshToken:
+            jti = uuid.uuid4().hex
+            return RefreshToken(
+                jti=jti,
+                token_hash=jti * 2,
+                user_id=user.id,
+                revoked=revoked,
+                expires_at=datetime.utcnow() + expires_in,
+            )
+
+        live = make_token(False, timedelta(days=1))
+        revoked = make_token(True, timedelta(days=1))
+        expired = make_token(False, timedelta(days=-1))
+        db.add_all([live, revoked, expired])
+        db.commit()
+        ids = [live.id, revoked.id, expired.id]
+
+        purge_refresh_tokens(batch_size=1)
+
+        remaining = {t.id for t in db.query(RefreshToken).filter(RefreshToken.id.in_(ids))}
+        self.assertEqual(remaining, {live.id})
+        db.close()
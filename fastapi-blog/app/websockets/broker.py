@@ -0,0 +1,197 @@
+import asyncio
+import json
+from collections import OrderedDict, deque
+from typing import Awaitable, Callable, Deque, Dict, List, Optional, Set, Tuple
+
+from redis import asyncio as aioredis
+from redis.exceptions import RedisError
+
+from app.core.config import settings
+
+MessageHandler = Callable[[int, dict], Awaitable[None]]
+
+
+def missed_frames(frames: List[dict], latest_seq: int, since: int) -> Tuple[List[dict], bool]:
+    """Frames after ``since`` and whether they cover everything that was missed.
+
+    Coverage fails when older frames were already evicted from the replay
+    buffer, or when ``since`` is ahead of the counter (it was reset).
+    """
+    missed = [frame for frame in frames if frame["seq"] > since]
+    if since > latest_seq:
+        return missed, False
+    oldest_seq = frames[0]["seq"] if frames else latest_seq + 1
+    return missed, oldest_seq <= since + 1
+
+
+class InMemoryBroker:
+    """Process-local stand-in for Redis pub/sub, for tests and single-worker runs.
+
+    Sequence numbers and replay buffers are kept for the ``max_posts`` most
+    recently published posts; older ones are dropped once nobody here is
+    subscribed to them, and their clients resync on reconnect.
+    """
+
+    def __init__(
+        self,
+        handler: MessageHandler,
+        replay_size: int = settings.COMMENT_REPLAY_BUFFER_SIZE,
+        max_posts: int = settings.COMMENT_REPLAY_MAX_POSTS,
+    ):
+        self.handler = handler
+        self.replay_size = replay_size
+        self.max_posts = max_posts
+        self.channels: Set[int] = set()
+        self._seqs: "OrderedDict[int, int]" = OrderedDict()
+        self._replay: Dict[int, Deque[dict]] = {}
+
+    async def subscribe(self, post_id: int):
+        self.channels.add(post_id)
+
+    async def unsubscribe(self, post_id: int):
+        self.channels.discard(post_id)
+
+    async def publish(self, post_id: int, message: dict):
+        seq = self._seqs.get(post_id, 0) + 1
+        self._seqs[post_id] = seq
+        self._seqs.move_to_end(post_id)
+        frame = {**message, "seq": seq}
+        self._replay.setdefault(post_id, deque(maxlen=self.replay_size)).append(frame)
+        self._evict()
+        if post_id in self.channels:
+            await self.handler(post_id, frame)
+
+    def _evict(self):
+        excess = len(self._seqs) - self.max_posts
+        for post_id in list(self._seqs):
+            if excess <= 0:
+                break
+            if post_id in self.channels:
+                continue
+            del self._seqs[post_id]
+            self._replay.pop(post_id, None)
+            excess -= 1
+
+    async def replay(self, post_id: int, since: int) -> Tuple[List[dict], bool]:
+        frames = list(self._replay.get(post_id, ()))
+        return missed_frames(frames, self._seqs.get(post_id, 0), since)
+
+    async def close(self):
+        self.channels.clear()
+
+
+class RedisBroker:
+    """Relays comment events between workers over Redis pub/sub.
+
+    Each worker subscribes to ``comments:<post_id>`` only while it holds at
+    least one socket for that post, and hands received messages to ``handler``.
+    Sequence numbers and the replay buffer live in Redis too, so they are
+    shared by all workers.
+    """
+
+    # Numbers, stores and publishes a frame atomically so every worker sees
+    # the same order in the replay list and on the channel. Both keys expire
+    # once the post goes quiet.
+    PUBLISH_SCRIPT = """
+    local seq = redis.call('INCR', KEYS[1])
+    local frame = cjson.decode(ARGV[1])
+    frame['seq'] = seq
+    local data = cjson.encode(frame)
+    redis.call('RPUSH', KEYS[2], data)
+    redis.call('LTRIM', KEYS[2], -tonumber(ARGV[2]), -1)
+    redis.call('EXPIRE', KEYS[2], ARGV[3])
+    redis.call('EXPIRE', KEYS[1], ARGV[4])
+    redis.call('PUBLISH', KEYS[3], data)
+    return seq
+    """
+
+    def __init__(
+        self,
+        handler: MessageHandler,
+        url: str,
+        prefix: str = "comments",
+        replay_size: int = settings.COMMENT_REPLAY_BUFFER_SIZE,
+        replay_ttl: int = settings.COMMENT_REPLAY_TTL_SECONDS,
+        seq_ttl: int = settings.COMMENT_SEQ_TTL_SECONDS,
+    ):
+        self.handler = handler
+        self.prefix = prefix
+        self.replay_size = replay_size
+        self.replay_ttl = replay_ttl
+        # The counter must outlive the replay list it numbers. Once it expires
+        # it restarts at 1 and clients ahead of it are told to resync.
+        self.seq_ttl = max(seq_ttl, replay_ttl)
+        self.client = aioredis.from_url(url)
+        self._publish = self.client.register_script(self.PUBLISH_SCRIPT)
+        self._pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+        self._listener: Optional[asyncio.Task] = None
+
+    def _channel(self, post_id: int) -> str:
+        return f"{self.prefix}:{post_id}"
+
+    def _seq_key(self, post_id: int) -> str:
+        return f"{self.prefix}:{post_id}:seq"
+
+    def _replay_key(self, post_id: int) -> str:
+        return f"{self.prefix}:{post_id}:replay"
+
+    async def subscribe(self, post_id: int):
+        await self._pubsub.subscribe(self._channel(post_id))
+        if self._listener is None or self._listener.done():
+            self._listener = asyncio.create_task(self._listen())
+
+    async def unsubscribe(self, post_id: int):
+        await self._pubsub.unsubscribe(self._channel(post_id))
+
+    async def publish(self, post_id: int, message: dict):
+        await self._publish(
+            keys=[self._seq_key(post_id), self._replay_key(post_id), self._channel(post_id)],
+            args=[json.dumps(message), self.replay_size, self.replay_ttl, self.seq_ttl],
+        )
+
+    async def replay(self, post_id: int, since: int) -> Tuple[List[dict], bool]:
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.get(self._seq_key(post_id))
+            pipe.lrange(self._replay_key(post_id), 0, -1)
+            latest_seq, frames = await pipe.execute()
+        frames = [json.loads(frame) for frame in frames]
+        return missed_frames(frames, int(latest_seq or 0), since)
+
+    async def _listen(self):
+        while True:
+            try:
+                if not self._pubsub.subscribed:
+                    await asyncio.sleep(1)
+                    continue
+                message = await self._pubsub.get_message(timeout=1.0)
+                if message is None:
+                    continue
+                channel = message["channel"].decode()
+                post_id = int(channel.rsplit(":", 1)[1])
+                await self.handler(post_id, json.loads(message["data"]))
+            except asyncio.CancelledError:
+                raise
+            except RedisError as e:
+                print(f"[ERROR] Redis pub/sub listener failed: {e}")
+                await asyncio.sleep(1)
+            except Exception as e:
+                print(f"[ERROR] Failed to relay comment event: {e}")
+
+    async def close(self):
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+        await self._pubsub.aclose()
+        await self.client.aclose()
+
+
+def build_broker(handler: MessageHandler, backend: str = settings.COMMENT_BROADCAST_BACKEND):
+    if backend == "memory":
+        return InMemoryBroker(handler)
+    if backend == "redis":
+        return RedisBroker(handler, settings.COMMENT_BROADCAST_REDIS_URL or settings.REDIS_BROKER_URL)
+    raise ValueError(f"Unknown comment broadcast backend: {backend}")
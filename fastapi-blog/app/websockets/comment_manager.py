@@ -1,35 +1,243 @@
-from typing import Dict, List
-from fastapi import WebSocket
+import asyncio
+import json
+import time
+from typing import Dict, List, Optional, Set
+from fastapi import WebSocket, status
+from app.core.config import settings
+from app.core.metrics import register_gauge
+from app.websockets.broker import build_broker
+
+PING = json.dumps({"type": "ping"})
+RESYNC = json.dumps({"type": "resync"})
+
+
+class CommentConnection:
+    """A socket with its own bounded outbound queue, drained by a writer task.
+
+    Broadcasts only enqueue, so a slow client never delays other clients or
+    the request that produced the event. While a resuming client is being
+    replayed to, live frames are held back and delivered afterwards.
+    """
+
+    def __init__(self, websocket: WebSocket, post_id: int, queue_size: int):
+        self.websocket = websocket
+        self.post_id = post_id
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.writer: Optional[asyncio.Task] = None
+        self.last_seen = time.monotonic()
+        self.last_seq = 0
+        self.held: Optional[List[dict]] = None
+
+    def touch(self):
+        self.last_seen = time.monotonic()
+
+    def enqueue(self, text: str) -> bool:
+        try:
+            self.queue.put_nowait(text)
+        except asyncio.QueueFull:
+            return False
+        return True
+
 
 class CommentConnectionManager:
-    def __init__(self):
-        self.active_connections: Dict[int, List[WebSocket]] = {}
+    def __init__(
+        self,
+        queue_size: int = settings.COMMENT_WS_QUEUE_SIZE,
+        ping_interval: float = settings.COMMENT_WS_PING_INTERVAL_SECONDS,
+        idle_timeout: float = settings.COMMENT_WS_IDLE_TIMEOUT_SECONDS,
+        batch_window_ms: int = settings.COMMENT_BATCH_WINDOW_MS,
+        batch_max_size: int = settings.COMMENT_BATCH_MAX_SIZE,
+    ):
+        self.queue_size = queue_size
+        self.ping_interval = ping_interval
+        self.idle_timeout = idle_timeout
+        self.batch_window = batch_window_ms / 1000
+        self.batch_max_size = batch_max_size
+        self.active_connections: Dict[int, Set[CommentConnection]] = {}
+        self.broker = build_broker(self.send_local)
+        self._heartbeat: Optional[asyncio.Task] = None
+        self._batches: Dict[int, List[dict]] = {}
+        self._batch_timers: Dict[int, asyncio.Task] = {}
+        # Drops scheduled from sync code; referenced here so they are not
+        # garbage-collected before they run.
+        self._drops: Set[asyncio.Task] = set()
+
+    async def connect(self, websocket: WebSocket, post_id: int, since: Optional[int] = None) -> CommentConnection:
+        """Register a socket; with ``since``, first replay the frames it missed.
 
-    async def connect(self, websocket: WebSocket, post_id: int):
+        If the replay buffer no longer reaches back to ``since`` the client is
+        sent {"type": "resync"} and should reload comments over HTTP.
+        """
         await websocket.accept()
+        connection = CommentConnection(websocket, post_id, self.queue_size)
+        connection.writer = asyncio.create_task(self._write(connection))
+        if since is not None:
+            connection.held = []
+            connection.last_seq = since
         if post_id not in self.active_connections:
-            self.active_connections[post_id] = []
-        self.active_connections[post_id].append(websocket)
-        print(f"CONNECTED WS: post_id={post_id}, total={len(self.active_connections[post_id])}")
+            self.active_connections[post_id] = set()
+            await self.broker.subscribe(post_id)
+        self.active_connections[post_id].add(connection)
+        if since is not None:
+            await self._replay(connection, since)
+        return connection
 
-    def disconnect(self, websocket: WebSocket, post_id: int):
-        if post_id in self.active_connections:
-            self.active_connections[post_id].remove(websocket)
-            if not self.active_connections[post_id]: 
-                del self.active_connections[post_id]
+    async def _replay(self, connection: CommentConnection, since: int):
+        try:
+            frames, complete = await self.broker.replay(connection.post_id, since)
+        except Exception as e:
+            print(f"[ERROR] Failed to load comment replay: {e}")
+            frames, complete = [], False
+        if not complete:
+            connection.enqueue(RESYNC)
+        for frame in frames:
+            # The replay can be longer than the queue, so wait for the writer
+            # here instead of treating the client as a slow consumer.
+            connection.last_seq = frame["seq"]
+            await connection.queue.put(json.dumps(frame))
+        held, connection.held = connection.held, None
+        for frame in held:
+            self._deliver(connection, frame, json.dumps(frame))
+
+    async def disconnect(self, connection: CommentConnection):
+        await self._remove(connection)
 
     async def broadcast(self, post_id: int, message: dict):
-        print(f"Connected WS for post_id {post_id} {message}")
-        print(self.active_connections)
-        if post_id in self.active_connections:
-            disconnected = []
-            for connection in self.active_connections.get(post_id, []):
-                try:
-                    print(f"Sending message to websocket: {connection}")
-                    await connection.send_json(message)
-                except Exception:
-                    disconnected.append(connection)
-            for conn in disconnected:
-                self.disconnect(conn, post_id)
-
-comment_manager = CommentConnectionManager()
\ No newline at end of file
+        """Publish to every worker; each relays it to its own sockets.
+
+        With a batching window, events for a post are held for up to that long
+        (or until batch_max_size accumulate) and sent as one
+        {"type": "batch", "events": [...]} frame.
+        """
+        if self.batch_window <= 0:
+            await self.broker.publish(post_id, message)
+            return
+
+        events = self._batches.setdefault(post_id, [])
+        events.append(message)
+        if len(events) >= self.batch_max_size:
+            await self._flush_batch(post_id)
+        elif post_id not in self._batch_timers:
+            self._batch_timers[post_id] = asyncio.create_task(self._flush_batch_later(post_id))
+
+    async def _flush_batch_later(self, post_id: int):
+        await asyncio.sleep(self.batch_window)
+        del self._batch_timers[post_id]
+        try:
+            await self._flush_batch(post_id)
+        except Exception as e:
+            print(f"[ERROR] Failed to publish comment batch: {e}")
+
+    async def _flush_batch(self, post_id: int):
+        timer = self._batch_timers.pop(post_id, None)
+        if timer is not None:
+            timer.cancel()
+        events = self._batches.pop(post_id, [])
+        if not events:
+            return
+        frame = events[0] if len(events) == 1 else {"type": "batch", "events": events}
+        await self.broker.publish(post_id, frame)
+
+    async def send_local(self, post_id: int, message: dict):
+        text = json.dumps(message)
+        for connection in list(self.active_connections.get(post_id, ())):
+            if connection.held is not None:
+                connection.held.append(message)
+            else:
+                self._deliver(connection, message, text)
+
+    def _deliver(self, connection: CommentConnection, message: dict, text: str):
+        seq = message.get("seq")
+        if seq is not None:
+            # Frames already replayed can arrive again live; send each seq once.
+            if seq <= connection.last_seq:
+                return
+            connection.last_seq = seq
+        if not connection.enqueue(text):
+            # Slow consumer: drop it rather than buffer without bound.
+            task = asyncio.create_task(self._drop(connection, status.WS_1013_TRY_AGAIN_LATER))
+            self._drops.add(task)
+            task.add_done_callback(self._drop_done)
+
+    def _drop_done(self, task: asyncio.Task):
+        self._drops.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            print(f"[ERROR] Failed to drop slow WebSocket: {task.exception()}")
+
+    async def ping_and_reap(self):
+        """Ping every socket; with an idle timeout, close those that stayed silent past it."""
+        deadline = time.monotonic() - self.idle_timeout if self.idle_timeout > 0 else None
+        for connections in list(self.active_connections.values()):
+            for connection in list(connections):
+                if deadline is not None and connection.last_seen < deadline:
+                    await self._drop(connection, status.WS_1001_GOING_AWAY)
+                elif not connection.enqueue(PING):
+                    await self._drop(connection, status.WS_1013_TRY_AGAIN_LATER)
+
+    def connection_count(self) -> int:
+        return sum(len(connections) for connections in self.active_connections.values())
+
+    def connection_counts(self) -> Dict[int, int]:
+        return {post_id: len(connections) for post_id, connections in self.active_connections.items()}
+
+    async def _run_heartbeat(self):
+        while True:
+            await asyncio.sleep(self.ping_interval)
+            try:
+                await self.ping_and_reap()
+            except Exception as e:
+                print(f"[ERROR] WebSocket heartbeat failed: {e}")
+
+    async def _write(self, connection: CommentConnection):
+        try:
+            while True:
+                text = await connection.queue.get()
+                await connection.websocket.send_text(text)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            await self._remove(connection, cancel_writer=False)
+
+    async def _drop(self, connection: CommentConnection, code: int):
+        await self._remove(connection)
+        try:
+            await connection.websocket.close(code=code)
+        except Exception:
+            pass
+
+    async def _remove(self, connection: CommentConnection, cancel_writer: bool = True):
+        connections = self.active_connections.get(connection.post_id)
+        if not connections or connection not in connections:
+            return
+        connections.discard(connection)
+        if cancel_writer and connection.writer is not None:
+            connection.writer.cancel()
+        if not connections:
+            del self.active_connections[connection.post_id]
+            await self.broker.unsubscribe(connection.post_id)
+
+    def start(self):
+        if self._heartbeat is None:
+            self._heartbeat = asyncio.create_task(self._run_heartbeat())
+
+    async def close(self):
+        if self._heartbeat is not None:
+            self._heartbeat.cancel()
+            try:
+                await self._heartbeat
+            except asyncio.CancelledError:
+                pass
+            self._heartbeat = None
+        for post_id in list(self._batches):
+            await self._flush_batch(post_id)
+        if self._drops:
+            await asyncio.gather(*self._drops, return_exceptions=True)
+        for connections in list(self.active_connections.values()):
+            for connection in list(connections):
+                await self._remove(connection)
+        await self.broker.close()
+
+comment_manager = CommentConnectionManager()
+
+register_gauge("ws_connections_total", comment_manager.connection_count)
+register_gauge("ws_connections_per_post", comment_manager.connection_counts)
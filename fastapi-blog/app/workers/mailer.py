@@ -0,0 +1,188 @@
+import queue
+import smtplib
+import threading
+from email.message import EmailMessage
+from typing import Callable, Iterable, List, Optional
+
+from app.core.config import settings
+
+
+def is_connection_error(error: BaseException) -> bool:
+    """Whether ``error`` broke the session, rather than the server rejecting one message.
+
+    Every ``SMTPException`` is an ``OSError``, so refused recipients, senders
+    and data have to be told apart from socket failures explicitly.
+    """
+    if isinstance(error, smtplib.SMTPServerDisconnected):
+        return True
+    return isinstance(error, OSError) and not isinstance(error, smtplib.SMTPException)
+
+
+def build_message(to_email: str, subject: str, content: str) -> EmailMessage:
+    message = EmailMessage()
+    message["From"] = settings.SMTP_USER
+    message["To"] = to_email
+    message["Subject"] = subject
+    message.set_content(content)
+    return message
+
+
+class PooledConnection:
+    """One SMTP session, opened lazily and reopened when retired or broken."""
+
+    def __init__(self, connect: Callable[[], smtplib.SMTP], max_messages: int):
+        self._connect = connect
+        self.max_messages = max_messages
+        self.smtp: Optional[smtplib.SMTP] = None
+        self.sent = 0
+
+    def send(self, message: EmailMessage):
+        # Many providers cap the messages accepted per session.
+        if self.smtp is not None and self.sent >= self.max_messages:
+            self.close()
+        if self.smtp is None:
+            self.smtp = self._connect()
+        try:
+            self.smtp.send_message(message)
+        except Exception as e:
+            # A rejected message leaves the session usable (smtplib resets it).
+            if not is_connection_error(e):
+                raise
+            # Broken session: retry once on a new one.
+            self.close()
+            self.smtp = self._connect()
+            self.smtp.send_message(message)
+        self.sent += 1
+
+    def close(self):
+        smtp, self.smtp, self.sent = self.smtp, None, 0
+        if smtp is None:
+            return
+        try:
+            smtp.quit()
+        except Exception:
+            smtp.close()
+
+
+class SMTPConnectionPool:
+    """Keeps up to ``size`` logged-in SMTP sessions open between tasks of a worker process.
+
+    Callers borrow a session for a whole batch, so STARTTLS and login happen
+    once per session instead of once per message.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        username: Optional[str],
+        password: Optional[str],
+        size: int = 2,
+        max_messages: int = 100,
+        timeout: float = 30,
+    ):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.timeout = timeout
+        self._connections = [PooledConnection(self._connect, max_messages) for _ in range(size)]
+        self._idle: "queue.LifoQueue[PooledConnection]" = queue.LifoQueue()
+        for connection in self._connections:
+            self._idle.put(connection)
+
+    def _connect(self) -> smtplib.SMTP:
+        smtp = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        try:
+            smtp.starttls()
+            if self.username:
+                smtp.login(self.username, self.password)
+        except Exception:
+            smtp.close()
+            raise
+        return smtp
+
+    def send(self, message: EmailMessage):
+        connection = self._idle.get()
+        try:
+            connection.send(message)
+        except Exception as e:
+            if is_connection_error(e):
+                connection.close()
+            raise
+        finally:
+            self._idle.put(connection)
+
+    def send_many(self, messages: Iterable[EmailMessage]) -> List[EmailMessage]:
+        """Send every message over one session; returns the ones that failed."""
+        failed = []
+        connection = self._idle.get()
+        try:
+            for message in messages:
+                try:
+                    connection.send(message)
+                except Exception as e:
+                    print(f"[ERROR] Failed to send email to {message['To']}: {e}")
+                    failed.append(message)
+                    if is_connection_error(e):
+                        # Start the next message on a clean session.
+                        connection.close()
+        finally:
+            self._idle.put(connection)
+        return failed
+
+    def close(self):
+        for connection in self._connections:
+            connection.close()
+
+
+class LocmemMailer:
+    """Collects messages in ``outbox`` instead of sending them; for tests and development."""
+
+    def __init__(self):
+        self.outbox: List[EmailMessage] = []
+
+    def send(self, message: EmailMessage):
+        self.outbox.append(message)
+
+    def send_many(self, messages: Iterable[EmailMessage]) -> List[EmailMessage]:
+        self.outbox.extend(messages)
+        return []
+
+    def close(self):
+        pass
+
+
+_mailer = None
+_mailer_lock = threading.Lock()
+
+
+def get_mailer():
+    # Built on first use, i.e. after Celery forked the worker process, so
+    # sockets are never shared between processes.
+    global _mailer
+    with _mailer_lock:
+        if _mailer is None:
+            if settings.EMAIL_BACKEND == "locmem":
+                _mailer = LocmemMailer()
+            elif settings.EMAIL_BACKEND == "smtp":
+                _mailer = SMTPConnectionPool(
+                    settings.SMTP_HOST,
+                    settings.SMTP_PORT,
+                    settings.SMTP_USER,
+                    settings.SMTP_PASSWORD,
+                    size=settings.SMTP_POOL_SIZE,
+                    max_messages=settings.SMTP_MAX_MESSAGES_PER_CONNECTION,
+                    timeout=settings.SMTP_TIMEOUT_SECONDS,
+                )
+            else:
+                raise ValueError(f"Unknown email backend: {settings.EMAIL_BACKEND}")
+        return _mailer
+
+
+def close_mailer():
+    global _mailer
+    with _mailer_lock:
+        if _mailer is not None:
+            _mailer.close()
+            _mailer = None
@@ -1,30 +1,339 @@
-from celery import Celery
+from celery import Celery, group
+from celery.signals import worker_process_shutdown
+from datetime import datetime, timedelta
+from typing import List
+from sqlalchemy import select, delete, or_
+from sqlalchemy.dialects import postgresql, sqlite
 from app.core.config import settings
-import aiosmtplib
-from email.message import EmailMessage
+from app.db.session import SessionLocal
+from app.db import base  # noqa: F401  (registers every model with the mapper)
+from app.models.token import RefreshToken
+from app.models.media_deletion import MediaDeletion
+from app.models.direct_upload import DirectUpload
+from app.models.outbox import OutboxMessage
+from app.models.post import Post
+from app.models.subscription import NotificationDelivery, Subscription
+from app.models.user import User
+from app.core.cloudinary_service import delete_media_batch_from_cloudinary
+from app.core.media_storage import delete_media_locally
+from app.workers.mailer import build_message, close_mailer, get_mailer
 
 celery = Celery(
     "worker",
     broker=settings.REDIS_BROKER_URL,
 )
 
+# Periodic housekeeping gets its own queue, so it neither waits behind fan-out
+# and email work nor counts toward EMAIL_QUEUE_MAX_DEPTH. Workers must consume
+# both queues (-Q celery,<CELERY_HOUSEKEEPING_QUEUE>).
+HOUSEKEEPING_TASKS = [
+    "app.workers.tasks.purge_refresh_tokens",
+    "app.workers.tasks.purge_notification_deliveries",
+    "app.workers.tasks.relay_outbox",
+    "app.workers.tasks.delete_media_files",
+    "app.workers.tasks.expire_direct_uploads",
+]
+celery.conf.task_routes = {task: {"queue": settings.CELERY_HOUSEKEEPING_QUEUE} for task in HOUSEKEEPING_TASKS}
+
+def _every(task: str, seconds: float) -> dict:
+    # A run still queued when the next one is due is dropped rather than piling up.
+    return {"task": task, "schedule": seconds, "options": {"expires": seconds}}
+
+celery.conf.beat_schedule = {
+    "purge-refresh-tokens": _every(
+        "app.workers.tasks.purge_refresh_tokens", settings.REFRESH_TOKEN_PURGE_INTERVAL_MINUTES * 60
+    ),
+    "purge-notification-deliveries": _every(
+        "app.workers.tasks.purge_notification_deliveries", settings.NOTIFICATION_DELIVERY_PURGE_INTERVAL_MINUTES * 60
+    ),
+    "relay-outbox": _every("app.workers.tasks.relay_outbox", settings.OUTBOX_RELAY_INTERVAL_SECONDS),
+    # Drains the media_deletions outbox; nothing else enqueues it.
+    "delete-media-files": _every("app.workers.tasks.delete_media_files", settings.MEDIA_DELETION_SWEEP_INTERVAL_SECONDS),
+    "expire-direct-uploads": _every(
+        "app.workers.tasks.expire_direct_uploads", settings.MEDIA_DIRECT_UPLOAD_SWEEP_INTERVAL_MINUTES * 60
+    ),
+}
+
+@worker_process_shutdown.connect
+def _close_mailer(**kwargs):
+    close_mailer()
+
+@celery.task(bind=True, max_retries=3)
+def send_notification_email(self, to_email: str, subject: str, content: str):
+    try:
+        get_mailer().send(build_message(to_email, subject, content))
+    except Exception as e:
+        print(f"[ERROR] Failed to send email to {to_email}: {e}")
+        raise self.retry(exc=e, countdown=60)
+
+@celery.task(bind=True, max_retries=3)
+def send_bulk_email(self, messages: List[dict]) -> int:
+    """Send [{"to_email", "subject", "content"}, ...] over one pooled SMTP session.
+
+    Only the messages that failed are retried.
+    """
+    built = [build_message(**message) for message in messages]
+    failed_ids = {id(message) for message in get_mailer().send_many(built)}
+    failed = [message for message, email in zip(messages, built) if id(email) in failed_ids]
+    if failed:
+        raise self.retry(
+            args=[failed],
+            exc=RuntimeError(f"{len(failed)} of {len(messages)} emails failed"),
+            countdown=60,
+        )
+    return len(messages)
+
+@celery.task
+def purge_refresh_tokens(batch_size: int = settings.REFRESH_TOKEN_PURGE_BATCH_SIZE) -> int:
+    """Delete revoked and expired refresh tokens in small transactions."""
+    deleted = 0
+    db = SessionLocal()
+    try:
+        while True:
+            batch = select(RefreshToken.id)\
+                .where(or_(RefreshToken.revoked.is_(True), RefreshToken.expires_at < datetime.utcnow()))\
+                .limit(batch_size)
+            result = db.execute(delete(RefreshToken).where(RefreshToken.id.in_(batch.scalar_subquery())))
+            db.commit()
+            deleted += result.rowcount
+            if result.rowcount < batch_size:
+                return deleted
+    finally:
+        db.close()
+
+def _delete_stored_files(public_ids, resource_type):
+    if settings.MEDIA_STORAGE_BACKEND == "local":
+        for public_id in public_ids:
+            delete_media_locally(public_id)
+        return public_ids
+    return delete_media_batch_from_cloudinary(public_ids, resource_type)
+
+@celery.task(bind=True, max_retries=settings.MEDIA_DELETION_MAX_RETRIES)
+def delete_media_files(self, batch_size: int = settings.MEDIA_DELETION_BATCH_SIZE) -> int:
+    """Drain the media_deletions outbox, one bulk delete per batch and resource type.
+
+    Rows that could not be deleted are kept and the task retries with backoff,
+    until a row reaches MEDIA_DELETION_MAX_ATTEMPTS and is no longer tried.
+    """
+    deleted = failed = last_id = 0
+    db = SessionLocal()
+    try:
+        while True:
+            rows = db.execute(
+                select(MediaDeletion)
+                .where(MediaDeletion.id > last_id, MediaDeletion.attempts < settings.MEDIA_DELETION_MAX_ATTEMPTS)
+                .order_by(MediaDeletion.id)
+                .limit(batch_size)
+                .with_for_update(skip_locked=True)
+            ).scalars().all()
+            if not rows:
+                break
+            last_id = rows[-1].id
+
+            by_type = {}
+            for row in rows:
+                by_type.setdefault(row.resource_type, []).append(row)
+            for resource_type, batch in by_type.items():
+                done = set(_delete_stored_files([row.public_id for row in batch], resource_type))
+                for row in batch:
+                    if row.public_id in done:
+                        db.delete(row)
+                        deleted += 1
+                    else:
+                        row.attempts += 1
+                        if row.attempts >= settings.MEDIA_DELETION_MAX_ATTEMPTS:
+                            print(f"[ERROR] Giving up deleting {row.resource_type} {row.public_id} after {row.attempts} attempts")
+                        else:
+                            failed += 1
+            db.commit()
+
+            if len(rows) < batch_size:
+                break
+    except Exception as e:
+        db.rollback()
+        print(f"[ERROR] Failed to delete media files: {e}")
+        raise self.retry(exc=e, countdown=30 * 2 ** self.request.retries)
+    finally:
+        db.close()
+
+    if failed:
+        raise self.retry(
+            exc=RuntimeError(f"{failed} media files could not be deleted"),
+            countdown=30 * 2 ** self.request.retries,
+        )
+    return deleted
+
+@celery.task
+def expire_direct_uploads(batch_size: int = settings.MEDIA_DELETION_BATCH_SIZE) -> int:
+    """Queue direct uploads that were signed but never confirmed for deletion."""
+    expired = 0
+    db = SessionLocal()
+    try:
+        while True:
+            rows = db.execute(
+                select(DirectUpload)
+                .where(DirectUpload.expires_at < datetime.utcnow())
+                .order_by(DirectUpload.id)
+                .limit(batch_size)
+                .with_for_update(skip_locked=True)
+            ).scalars().all()
+            for row in rows:
+                db.add(MediaDeletion(public_id=row.public_id, resource_type=row.resource_type))
+                db.delete(row)
+            db.commit()
+            expired += len(rows)
+            if len(rows) < batch_size:
+                return expired
+    finally:
+        db.close()
+
+def _post_notification_key(post_id: int) -> str:
+    return f"post:{post_id}"
+
+def _upsert_for(db):
+    # INSERT ... ON CONFLICT DO NOTHING is dialect-specific in SQLAlchemy.
+    return postgresql.insert if db.bind.dialect.name == "postgresql" else sqlite.insert
+
+@celery.task
+def fan_out_post_notification(
+    post_id: int,
+    chunk_size: int = settings.NOTIFICATION_FANOUT_CHUNK_SIZE,
+    group_size: int = settings.NOTIFICATION_FANOUT_GROUP_SIZE,
+) -> int:
+    """Split the author's subscribers into notify_subscribers tasks.
+
+    Subscriber ids are read in keyset-paginated chunks and published a group
+    at a time, so neither this task nor any message holds the full list.
+    """
+    chunks = last_id = 0
+    pending = []
+    db = SessionLocal()
+    try:
+        author_id = db.execute(select(Post.author_id).where(Post.id == post_id)).scalar_one_or_none()
+        if author_id is None:
+            return 0
+        while True:
+            subscriber_ids = db.execute(
+                select(Subscription.subscriber_id)
+                .where(Subscription.author_id == author_id, Subscription.subscriber_id > last_id)
+                .order_by(Subscription.subscriber_id)
+                .limit(chunk_size)
+            ).scalars().all()
+            if subscriber_ids:
+                last_id = subscriber_ids[-1]
+                pending.append(notify_subscribers.s(post_id, subscriber_ids))
+                chunks += 1
+            if pending and (len(pending) >= group_size or len(subscriber_ids) < chunk_size):
+                group(pending).apply_async()
+                pending = []
+            if len(subscriber_ids) < chunk_size:
+                return chunks
+    finally:
+        db.close()
+
 @celery.task
-def send_notification_email(to_email: str, subject: str, content: str):
-    message = EmailMessage()
-    message["From"] = settings.SMTP_USER
-    message["To"] = to_email
-    message["Subject"] = subject
-    message.set_content(content)
-
-    # Use aiosmtplib to send email asynchronously
-    import asyncio
-    async def send_email():
-        await aiosmtplib.send(
-            message,
-            hostname=settings.SMTP_HOST,
-            port=settings.SMTP_PORT,
-            start_tls=True,
-            username=settings.SMTP_USER,
-            password=settings.SMTP_PASSWORD,
+def purge_notification_deliveries(batch_size: int = settings.NOTIFICATION_DELIVERY_PURGE_BATCH_SIZE) -> int:
+    """Delete delivery records older than the retention window in small transactions."""
+    deleted = 0
+    cutoff = datetime.utcnow() - timedelta(days=settings.NOTIFICATION_DELIVERY_RETENTION_DAYS)
+    db = SessionLocal()
+    try:
+        while True:
+            batch = select(NotificationDelivery.id)\
+                .where(NotificationDelivery.created_at < cutoff)\
+                .limit(batch_size)
+            result = db.execute(delete(NotificationDelivery).where(NotificationDelivery.id.in_(batch.scalar_subquery())))
+            db.commit()
+            deleted += result.rowcount
+            if result.rowcount < batch_size:
+                return deleted
+    finally:
+        db.close()
+
+@celery.task(bind=True, max_retries=3)
+def notify_subscribers(self, post_id: int, subscriber_ids: List[int]) -> int:
+    """Email one chunk of subscribers about a new post, skipping those already notified.
+
+    Recipients are claimed by inserting their delivery rows before sending, so
+    when the same chunk runs twice (redelivery, duplicate fan-out) each
+    subscriber is emailed by only one run. Claims of failed sends are released
+    for the retry.
+    """
+    key = _post_notification_key(post_id)
+    db = SessionLocal()
+    try:
+        post = db.execute(
+            select(Post.title, Post.content, User.username)
+            .join(User, User.id == Post.author_id)
+            .where(Post.id == post_id)
+        ).one_or_none()
+        if post is None:
+            return 0
+        emails = dict(db.execute(select(User.id, User.email).where(User.id.in_(subscriber_ids))).all())
+        if not emails:
+            return 0
+
+        claimed = db.execute(
+            _upsert_for(db)(NotificationDelivery)
+            .values([{"notification_key": key, "user_id": user_id} for user_id in emails])
+            .on_conflict_do_nothing(index_elements=["notification_key", "user_id"])
+            .returning(NotificationDelivery.user_id)
+        ).scalars().all()
+        db.commit()
+
+        messages = [
+            (user_id, build_message(emails[user_id], f"New post by {post.username}", f"Title: {post.title}\n\n{post.content}"))
+            for user_id in claimed
+        ]
+        failed_ids = {id(message) for message in get_mailer().send_many(message for _, message in messages)}
+        failed = [user_id for user_id, message in messages if id(message) in failed_ids]
+        if failed:
+            db.execute(delete(NotificationDelivery).where(
+                NotificationDelivery.notification_key == key,
+                NotificationDelivery.user_id.in_(failed)
+            ))
+            db.commit()
+    finally:
+        db.close()
+
+    if failed:
+        raise self.retry(
+            args=[post_id, failed],
+            exc=RuntimeError(f"{len(failed)} notifications for post {post_id} failed"),
+            countdown=60,
         )
-    asyncio.run(send_email())
+    return len(messages) - len(failed)
+
+@celery.task
+def relay_outbox(batch_size: int = settings.OUTBOX_RELAY_BATCH_SIZE) -> int:
+    """Publish pending outbox rows to the broker and delete them.
+
+    Delivery is at-least-once: a crash between publishing and committing
+    publishes the batch again, so the tasks must be idempotent. SKIP LOCKED
+    lets several relays run without publishing the same row twice.
+    """
+    relayed = 0
+    db = SessionLocal()
+    try:
+        while True:
+            rows = db.execute(
+                select(OutboxMessage)
+                .order_by(OutboxMessage.id)
+                .limit(batch_size)
+                .with_for_update(skip_locked=True)
+            ).scalars().all()
+            published = []
+            try:
+                for row in rows:
+                    celery.send_task(row.task, args=row.args, kwargs=row.kwargs)
+                    published.append(row.id)
+            finally:
+                # Whatever went out is removed even if the broker failed midway.
+                if published:
+                    db.execute(delete(OutboxMessage).where(OutboxMessage.id.in_(published)))
+                db.commit()
+            relayed += len(published)
+            if len(rows) < batch_size:
+                return relayed
+    finally:
+        db.close()
@@ -3,4 +3,11 @@ echo "Running Alembic migrations..."
 alembic upgrade head
 
 echo "Starting app..."
-exec uvicorn app.main:app --host 0.0.0.0 --port 8000
+# Take the client address from X-Forwarded-For, but only when the request comes
+# from a trusted proxy; rate limits are keyed on it. Set FORWARDED_ALLOW_IPS to
+# the proxy's address(es), or "*" when only the proxy can reach the app.
+# WebSocket protocol pings close half-open comment sockets; clients answer
+# them without any application code.
+exec uvicorn app.main:app --host 0.0.0.0 --port 8000 \
+    --proxy-headers --forwarded-allow-ips "${FORWARDED_ALLOW_IPS:-127.0.0.1}" \
+    --ws-ping-interval 20 --ws-ping-timeout 20